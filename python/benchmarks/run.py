@@ -0,0 +1,310 @@
+"""Benchmarks of VideoLibrary and VideoPlayer on synthetic catalogs.
+
+For every catalog size, a fresh process loads a synthetic catalog and
+measures the load time, the time to build the search indexes, the peak
+resident set size, and the latency of every CommandParser verb. The
+results are written as JSON, and can be compared with an earlier run to
+catch regressions:
+
+    python3 -m benchmarks.run --sizes 1000 100000 --output new.json
+    python3 -m benchmarks.run --sizes 1000 100000 --compare old.json
+
+Catalogs are generated in a temporary directory unless --catalogs names
+a directory to keep them in, as large ones take a while to write.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.output_sink import ResultSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+from . import synthetic
+
+_PLAYLIST = "bench"
+_PAGE = "20"
+_PERCENTILES = (50, 90, 99)
+
+
+class _Workload:
+    """Produces the arguments of the benchmarked commands."""
+
+    def __init__(self, library, seed):
+        self._rng = random.Random(seed)
+        self._size = len(library.get_all_videos())
+        sample = [library.get_video(synthetic.video_id(number))
+                  for number in self._rng.sample(range(self._size),
+                                                 min(self._size, 1000))]
+        self._words = [word for video in sample
+                       for word in video.title.split()]
+        self._tags = [tag for video in sample for tag in video.tags]
+        self.added = None
+        self.flagged = None
+
+    def video_id(self):
+        return synthetic.video_id(self._rng.randrange(self._size))
+
+    def add(self):
+        """Returns a video id to add to the playlist, remembered so the
+        same iteration can remove it again."""
+        self.added = self.video_id()
+        return self.added
+
+    def flag(self):
+        """Returns a video id to flag, remembered so the same iteration
+        can allow it again."""
+        self.flagged = self.video_id()
+        return self.flagged
+
+    def offset(self):
+        return str(self._rng.randrange(self._size))
+
+    def word(self):
+        return self._rng.choice(self._words)
+
+    def tag(self):
+        return self._rng.choice(self._tags)
+
+
+# Every verb and how to make its arguments from a workload and the
+# iteration number. The playlist commands run in this order, so there is
+# a playlist to add to, show and remove from, and one to clear and delete
+# in each iteration. Each iteration removes the video it added and allows
+# the video it flagged, so those commands are timed on success, not on
+# their error paths.
+_COMMANDS = (
+    ("NUMBER_OF_VIDEOS", lambda work, i: []),
+    ("SHOW_ALL_VIDEOS", lambda work, i: [work.offset(), _PAGE]),
+    ("PLAY", lambda work, i: [work.video_id()]),
+    ("PLAY_RANDOM", lambda work, i: []),
+    ("PAUSE", lambda work, i: []),
+    ("CONTINUE", lambda work, i: []),
+    ("SHOW_PLAYING", lambda work, i: []),
+    ("STOP", lambda work, i: []),
+    ("CREATE_PLAYLIST", lambda work, i: [f"{_PLAYLIST}_{i}"]),
+    ("ADD_TO_PLAYLIST", lambda work, i: [_PLAYLIST, work.add()]),
+    ("SHOW_PLAYLIST", lambda work, i: [_PLAYLIST, "0", _PAGE]),
+    ("SHOW_ALL_PLAYLISTS", lambda work, i: ["0", _PAGE]),
+    ("REMOVE_FROM_PLAYLIST", lambda work, i: [_PLAYLIST, work.added]),
+    ("CLEAR_PLAYLIST", lambda work, i: [f"{_PLAYLIST}_{i}"]),
+    ("DELETE_PLAYLIST", lambda work, i: [f"{_PLAYLIST}_{i}"]),
+    ("SEARCH_VIDEOS", lambda work, i: [work.word()]),
+    ("SEARCH_VIDEOS_WITH_TAG", lambda work, i: [work.tag()]),
+    ("FLAG_VIDEO", lambda work, i: [work.flag(), "benchmark"]),
+    ("ALLOW_VIDEO", lambda work, i: [work.flagged]),
+    ("HELP", lambda work, i: []),
+)
+
+
+def _percentile(ordered, percent):
+    """Returns the nearest-rank percentile of a sorted list."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    summary = {"count": len(ordered)}
+    for percent in _PERCENTILES:
+        summary[f"p{percent}_us"] = _percentile(ordered, percent) / 1000
+    summary["max_us"] = ordered[-1] / 1000
+    return summary
+
+
+def _max_rss_kib():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else.
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def measure(videos_file, lazy=False, iterations=200, seed=0):
+    """Loads a catalog and times every command against it.
+
+    Runs in the calling process, so the peak RSS it reports includes
+    whatever the process used before; run() measures each catalog in a
+    fresh process.
+
+    Args:
+        videos_file: The catalog, in the videos.txt or compiled format.
+        lazy: Whether to load a videos.txt file lazily.
+        iterations: How many times to run each command.
+        seed: Seeds the command arguments and PLAY_RANDOM.
+
+    Returns:
+        A dict of the load and index build times in seconds, the peak RSS
+        in KiB, and the latency summary of each command.
+    """
+    start = time.perf_counter()
+    library = VideoLibrary(lazy=lazy, videos_file=videos_file)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    library.get_videos_by_title(0, 1)
+    index_seconds = time.perf_counter() - start
+
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(library, prompt=lambda: "",
+                                       output=output, seed=seed))
+    parser.execute_command(["CREATE_PLAYLIST", _PLAYLIST])
+    workload = _Workload(library, seed)
+    latencies = {verb: [] for verb, _ in _COMMANDS}
+    for iteration in range(iterations):
+        for verb, arguments in _COMMANDS:
+            command = [verb] + arguments(workload, iteration)
+            start = time.perf_counter_ns()
+            try:
+                parser.execute_command(command)
+            except CommandException:
+                pass
+            latencies[verb].append(time.perf_counter_ns() - start)
+            output.take()
+
+    return {
+        "load_seconds": load_seconds,
+        "index_seconds": index_seconds,
+        "max_rss_kib": _max_rss_kib(),
+        "commands": {verb: _summary(times)
+                     for verb, times in latencies.items()},
+    }
+
+
+def _catalog(directory, size, compiled, seed):
+    suffix = "bin" if compiled else "txt"
+    path = Path(directory) / f"videos_{size}_{seed}.{suffix}"
+    if not path.exists():
+        partial = path.with_name(path.name + ".tmp")
+        if compiled:
+            synthetic.write_compiled_file(partial, size, seed=seed)
+        else:
+            synthetic.write_videos_file(partial, size, seed=seed)
+        os.replace(partial, path)
+    return path
+
+
+def _mode(lazy, compiled):
+    return "compiled" if compiled else "lazy" if lazy else "eager"
+
+
+def run(sizes, catalogs, lazy=False, compiled=False, iterations=200, seed=0):
+    """Measures every catalog size, each in a fresh process.
+
+    Returns:
+        The benchmark report, as a JSON-serializable dict.
+    """
+    results = []
+    for size in sizes:
+        path = _catalog(catalogs, size, compiled, seed)
+        worker = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", str(path),
+             "--iterations", str(iterations), "--seed", str(seed)]
+            + (["--lazy"] if lazy else []),
+            check=True, stdout=subprocess.PIPE, text=True,
+            cwd=Path(__file__).parent.parent)
+        result = {"size": size, "mode": _mode(lazy, compiled)}
+        result.update(json.loads(worker.stdout))
+        results.append(result)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(baseline, report, threshold):
+    """Lists the measurements of report that regressed from baseline.
+
+    Times and percentiles are compared for every (size, mode) present in
+    both reports.
+
+    Args:
+        baseline: An earlier report.
+        report: The new report.
+        threshold: How many times slower (or larger) a measurement may be
+            before it counts as a regression.
+
+    Returns:
+        A list of human-readable regression descriptions.
+    """
+    earlier = {(result["size"], result["mode"]): result
+               for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = earlier.get((result["size"], result["mode"]))
+        if old is None:
+            continue
+        pairs = [(key, old[key], result[key])
+                 for key in ("load_seconds", "index_seconds", "max_rss_kib")]
+        for verb, summary in result["commands"].items():
+            if verb in old["commands"]:
+                pairs.extend(
+                    (f"{verb} {key}", old["commands"][verb][key], value)
+                    for key, value in summary.items() if key != "count")
+        for name, before, after in pairs:
+            if before > 0 and after > before * threshold:
+                regressions.append(
+                    f"{result['size']} {result['mode']} {name}: "
+                    f"{before:g} -> {after:g}")
+    return regressions
+
+
+def _main(args):
+    if args.worker is not None:
+        json.dump(measure(args.worker, args.lazy, args.iterations,
+                          args.seed), sys.stdout)
+        return 0
+
+    with tempfile.TemporaryDirectory() as scratch:
+        report = run(args.sizes, args.catalogs or scratch, args.lazy,
+                     args.compiled, args.iterations, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n")
+
+    if args.compare is not None:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+",
+                            default=[1000, 10000, 100000],
+                            help="catalog sizes to measure, up to 10000000")
+    arg_parser.add_argument("--lazy", action="store_true",
+                            help="load the videos.txt catalogs lazily")
+    arg_parser.add_argument("--compiled", action="store_true",
+                            help="measure compiled catalogs")
+    arg_parser.add_argument("--iterations", type=int, default=200,
+                            help="how many times to run each command")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--catalogs", metavar="DIR",
+                            help="generate catalogs in (and reuse them from) "
+                                 "DIR")
+    arg_parser.add_argument("--output", metavar="FILE",
+                            help="write the JSON report to FILE")
+    arg_parser.add_argument("--compare", metavar="FILE",
+                            help="compare with the JSON report in FILE and "
+                                 "exit with status 1 on regressions")
+    arg_parser.add_argument("--threshold", type=float, default=1.25,
+                            help="slowdown counted as a regression")
+    arg_parser.add_argument("--worker", metavar="CATALOG",
+                            help=argparse.SUPPRESS)
+    sys.exit(_main(arg_parser.parse_args()))
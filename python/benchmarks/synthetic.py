@@ -0,0 +1,98 @@
+"""Synthetic video catalogs for benchmarks.
+
+Titles and tags are drawn from fixed vocabularies with Zipf-distributed
+frequencies, so a few tags and title words are very common and most are
+rare, as in a real catalog. Catalogs are reproducible from their seed.
+
+Write a catalog with:
+
+    python3 -m benchmarks.synthetic 100000 /tmp/videos_100k.txt
+"""
+import argparse
+import hashlib
+import itertools
+import random
+
+from src.catalog import write_catalog
+
+_SYLLABLES = ("ka", "lo", "mi", "nu", "pe", "ra", "si", "to", "vu", "ze",
+              "bo", "di", "fa", "gu", "he", "jo")
+
+
+def _vocabulary(size, prefix=""):
+    """Returns size distinct made-up words, shortest first."""
+    words = []
+    for length in itertools.count(2):
+        for syllables in itertools.product(_SYLLABLES, repeat=length):
+            words.append(prefix + "".join(syllables))
+            if len(words) == size:
+                return words
+
+
+def _zipf_weights(size, exponent):
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def video_id(number):
+    """Returns the id of the number-th video of a synthetic catalog.
+
+    Ids are hashes of the number, so rows are not in id order, as in a
+    real catalog, and loading cannot rely on ids arriving sorted.
+    """
+    digest = hashlib.blake2b(number.to_bytes(8, "little"), digest_size=8)
+    return f"video_{digest.hexdigest()}"
+
+
+def videos(size, seed=0, word_count=5000, tag_count=10000, exponent=1.1):
+    """Yields the (title, url, tags) of size synthetic videos.
+
+    Args:
+        size: How many videos to generate.
+        seed: Seeds the random choices, so catalogs are reproducible.
+        word_count: How many distinct words titles are made of.
+        tag_count: How many distinct tags there are.
+        exponent: The Zipf exponent of word and tag frequencies.
+    """
+    rng = random.Random(seed)
+    words = _vocabulary(word_count)
+    word_weights = _zipf_weights(word_count, exponent)
+    tags = _vocabulary(tag_count, prefix="#")
+    tag_weights = _zipf_weights(tag_count, exponent)
+    for number in range(size):
+        title = " ".join(rng.choices(
+            words, cum_weights=word_weights, k=rng.randint(2, 6))).title()
+        video_tags = list(dict.fromkeys(rng.choices(
+            tags, cum_weights=tag_weights, k=rng.randint(0, 4))))
+        yield title, video_id(number), video_tags
+
+
+def write_videos_file(path, size, **options):
+    """Writes a synthetic catalog in the videos.txt format.
+
+    Args:
+        path: The file to write.
+        size: How many videos to generate.
+        options: Passed on to videos().
+    """
+    with open(path, "w") as videos_file:
+        videos_file.writelines(
+            f"{title} | {url} | {','.join(tags)}\n"
+            for title, url, tags in videos(size, **options))
+
+
+def write_compiled_file(path, size, **options):
+    """Writes a synthetic catalog compiled with src.catalog."""
+    write_catalog(videos(size, **options), path)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("size", type=int)
+    arg_parser.add_argument("path")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--compiled", action="store_true",
+                            help="write a compiled catalog")
+    args = arg_parser.parse_args()
+    write = write_compiled_file if args.compiled else write_videos_file
+    write(args.path, args.size, seed=args.seed)
@@ -0,0 +1,229 @@
+"""A compiled, binary video catalog.
+
+The compiled format holds the same data as videos.txt but can be loaded
+with a handful of bulk reads instead of being parsed row by row:
+
+    header      magic, then the video, tag, tag reference, hash slot and
+                string pool counts (little-endian uint32)
+    records     per video: title offset/length, url offset/length and the
+                start/count of its tag references (uint32)
+    tag refs    per video tag, its index in the tag table (uint16, or
+                uint32 in catalogs of more than 65536 distinct tags)
+    tag table   per distinct tag: offset/length in the string pool (uint32)
+    id table    open-addressing hash table of record numbers + 1, keyed by
+                the crc32 of the url (uint32, 0 marks an empty slot)
+    pool        the utf-8 encoded titles, urls and tags
+
+Compile a catalog with:
+
+    python3 -m src.catalog src/videos.txt src/videos.bin
+"""
+
+from array import array
+import csv
+import struct
+import sys
+import zlib
+
+MAGIC = b"YTVCAT01"
+# The magic of catalogs with uint32 tag refs.
+WIDE_MAGIC = b"YTVCAT02"
+
+_HEADER = struct.Struct("<5I")
+_RECORD_FIELDS = 6
+_MAX_SHORT_TAGS = 0x10000
+
+
+def _load_array(typecode, data, offset, count):
+    items = array(typecode)
+    end = offset + count * items.itemsize
+    items.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        items.byteswap()
+    return items, end
+
+
+def _dump_array(items):
+    if sys.byteorder == "big":
+        items = array(items.typecode, items)
+        items.byteswap()
+    return items.tobytes()
+
+
+def _slot_count(video_count):
+    # A power of two at least twice the number of videos keeps probe
+    # sequences short.
+    slots = 1
+    while slots < 2 * video_count:
+        slots <<= 1
+    return slots
+
+
+def is_compiled(path):
+    """Returns True if the file at path is a compiled catalog."""
+    with open(path, "rb") as catalog_file:
+        return catalog_file.read(len(MAGIC)) in (MAGIC, WIDE_MAGIC)
+
+
+def write_catalog(videos, path):
+    """Writes videos to path in the compiled catalog format.
+
+    Args:
+        videos: An iterable of (title, url, tags) tuples.
+        path: The file to write.
+    """
+    pool = bytearray()
+    records = array("I")
+    tag_refs = array("I")
+    tag_table = array("I")
+    tag_numbers = {}
+    urls = []
+
+    def pack(text):
+        encoded = text.encode()
+        offset = len(pool)
+        pool.extend(encoded)
+        return offset, len(encoded)
+
+    for title, url, tags in videos:
+        encoded_url = url.encode()
+        urls.append(encoded_url)
+        records.extend(pack(title))
+        records.extend((len(pool), len(encoded_url)))
+        pool.extend(encoded_url)
+        records.extend((len(tag_refs), len(tags)))
+        for tag in tags:
+            if tag not in tag_numbers:
+                tag_numbers[tag] = len(tag_numbers)
+                tag_table.extend(pack(tag))
+            tag_refs.append(tag_numbers[tag])
+
+    slots = array("I", bytes(4 * _slot_count(len(urls))))
+    mask = len(slots) - 1
+    for number, encoded_url in enumerate(urls):
+        slot = zlib.crc32(encoded_url) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = number + 1
+
+    magic = WIDE_MAGIC
+    if len(tag_numbers) <= _MAX_SHORT_TAGS:
+        magic, tag_refs = MAGIC, array("H", tag_refs)
+    with open(path, "wb") as catalog_file:
+        catalog_file.write(magic)
+        catalog_file.write(_HEADER.pack(
+            len(urls), len(tag_numbers), len(tag_refs), len(slots),
+            len(pool)))
+        for section in (records, tag_refs, tag_table, slots):
+            catalog_file.write(_dump_array(section))
+        catalog_file.write(pool)
+
+
+def compile_videos_file(videos_file, path):
+    """Compiles a catalog in the videos.txt format.
+
+    Rows are streamed from the source straight into write_catalog, without
+    building a VideoLibrary.
+
+    Args:
+        videos_file: The videos.txt file to read.
+        path: The compiled catalog file to write.
+    """
+    # Imported here, as video_library imports this module.
+    from .video_library import _csv_reader_with_strip, _parse_tags
+
+    with open(videos_file) as video_file:
+        reader = _csv_reader_with_strip(csv.reader(video_file, delimiter="|"))
+        write_catalog(((title, url, _parse_tags(tags))
+                       for title, url, tags in reader), path)
+
+
+class CompiledCatalog:
+    """A read-only catalog loaded from a compiled catalog file.
+
+    Rows are decoded on demand; nothing but the raw sections is held in
+    memory.
+    """
+
+    def __init__(self, path):
+        """The CompiledCatalog class is initialized.
+
+        Args:
+            path: The compiled catalog file.
+
+        Raises:
+            ValueError: If the file is not a compiled catalog.
+        """
+        with open(path, "rb") as catalog_file:
+            data = catalog_file.read()
+        magic = data[:len(MAGIC)]
+        if magic not in (MAGIC, WIDE_MAGIC):
+            raise ValueError(f"{path} is not a compiled video catalog")
+
+        offset = len(MAGIC)
+        (video_count, tag_count, tag_ref_count, slot_count,
+         pool_size) = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        self._records, offset = _load_array(
+            "I", data, offset, video_count * _RECORD_FIELDS)
+        self._tag_refs, offset = _load_array(
+            "I" if magic == WIDE_MAGIC else "H", data, offset, tag_ref_count)
+        tag_table, offset = _load_array("I", data, offset, 2 * tag_count)
+        self._slots, offset = _load_array("I", data, offset, slot_count)
+        self._pool = data[offset:offset + pool_size]
+        self._tags = [self._text(tag_table[2 * number],
+                                 tag_table[2 * number + 1])
+                      for number in range(tag_count)]
+
+    def __len__(self):
+        return len(self._records) // _RECORD_FIELDS
+
+    def __iter__(self):
+        for number in range(len(self)):
+            offset, length = self._field(number, 2)
+            yield self._text(offset, length)
+
+    def __contains__(self, video_id):
+        return self._find(video_id) is not None
+
+    def _text(self, offset, length):
+        return self._pool[offset:offset + length].decode()
+
+    def _field(self, number, field):
+        base = number * _RECORD_FIELDS + field
+        return self._records[base], self._records[base + 1]
+
+    def _find(self, video_id):
+        encoded = video_id.encode()
+        mask = len(self._slots) - 1
+        slot = zlib.crc32(encoded) & mask
+        while self._slots[slot]:
+            number = self._slots[slot] - 1
+            offset, length = self._field(number, 2)
+            if self._pool[offset:offset + length] == encoded:
+                return number
+            slot = (slot + 1) & mask
+        return None
+
+    def _row(self, number):
+        title = self._text(*self._field(number, 0))
+        url = self._text(*self._field(number, 2))
+        start, count = self._field(number, 4)
+        tags = [self._tags[ref] for ref in self._tag_refs[start:start + count]]
+        return title, url, tags
+
+    def row(self, video_id):
+        """Returns the (title, url, tags) of a video, or None if missing."""
+        number = self._find(video_id)
+        return None if number is None else self._row(number)
+
+    def rows(self):
+        """Yields the (title, url, tags) of every video in catalog order."""
+        for number in range(len(self)):
+            yield self._row(number)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python3 -m src.catalog <videos.txt> <catalog>")
+    compile_videos_file(sys.argv[1], sys.argv[2])
@@ -0,0 +1,103 @@
+"""Counters and latency histograms of executed commands.
+
+The metrics are exported in the Prometheus text exposition format:
+
+    youtube_commands_total{command="PLAY"} 12
+    youtube_command_errors_total{command="PLAY"} 1
+    youtube_command_seconds_bucket{command="PLAY",le="0.0001"} 9
+    ...
+"""
+import bisect
+
+# Upper bounds of the latency histogram buckets, in seconds.
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+           0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Commands that are not registered are all counted under this name, so
+# mistyped commands cannot create an unbounded number of series.
+UNKNOWN = "UNKNOWN"
+
+
+class _Series:
+    """The counters of one command."""
+
+    __slots__ = ("calls", "errors", "seconds", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        # One count per bucket plus one for slower calls (le="+Inf").
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+class CommandMetrics:
+    """A class used to count commands and how long they take.
+
+    Recording a call costs a dict lookup and a bisect over the bucket
+    bounds, so metrics can stay enabled in production. One instance may
+    be shared by many CommandParsers.
+    """
+
+    def __init__(self):
+        """The CommandMetrics class is initialized."""
+        self._series = {}
+
+    def observe(self, command, seconds, failed=False):
+        """Records one call of a command.
+
+        Args:
+            command: The upper case command name, or UNKNOWN.
+            seconds: How long the call took.
+            failed: Whether the call raised an exception.
+        """
+        series = self._series.get(command)
+        if series is None:
+            series = self._series[command] = _Series()
+        series.calls += 1
+        series.errors += failed
+        series.seconds += seconds
+        series.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def calls(self, command):
+        """Returns how many times a command was called."""
+        series = self._series.get(command)
+        return 0 if series is None else series.calls
+
+    def errors(self, command):
+        """Returns how many calls of a command raised an exception."""
+        series = self._series.get(command)
+        return 0 if series is None else series.errors
+
+    def render(self):
+        """Returns the metrics in the Prometheus text format."""
+        lines = [
+            "# HELP youtube_commands_total Commands executed.",
+            "# TYPE youtube_commands_total counter",
+        ]
+        commands = sorted(self._series.items())
+        lines.extend(f'youtube_commands_total{{command="{command}"}} '
+                     f'{series.calls}' for command, series in commands)
+        lines.extend([
+            "# HELP youtube_command_errors_total Commands that raised an "
+            "error.",
+            "# TYPE youtube_command_errors_total counter",
+        ])
+        lines.extend(f'youtube_command_errors_total{{command="{command}"}} '
+                     f'{series.errors}' for command, series in commands)
+        lines.extend([
+            "# HELP youtube_command_seconds Command latency.",
+            "# TYPE youtube_command_seconds histogram",
+        ])
+        for command, series in commands:
+            label = f'command="{command}"'
+            count = 0
+            for bound, bucket in zip(BUCKETS + ("+Inf",), series.buckets):
+                count += bucket
+                lines.append(f'youtube_command_seconds_bucket{{{label},'
+                             f'le="{bound}"}} {count}')
+            lines.append(f"youtube_command_seconds_sum{{{label}}} "
+                         f"{series.seconds:.6f}")
+            lines.append(f"youtube_command_seconds_count{{{label}}} "
+                         f"{series.calls}")
+        return "\n".join(lines) + "\n"
@@ -1,7 +1,10 @@
 """A command parser class."""
 
 import textwrap
-from typing import Sequence
+import time
+from typing import Callable, FrozenSet, Iterable, NamedTuple, Optional, Sequence
+
+from .command_metrics import UNKNOWN
 
 
 class CommandException(Exception):
@@ -9,137 +12,202 @@ class CommandException(Exception):
     pass
 
 
+class _Command(NamedTuple):
+    """A registered command: its handler and how it may be called."""
+    handler: Callable
+    arities: Optional[FrozenSet[int]]
+    usage: str
+    argument_types: Sequence[Callable]
+
+
+def non_negative_int(text: str) -> int:
+    """Converts a command argument to an int of at least zero.
+
+    Raises:
+        ValueError: If text is not a non-negative whole number.
+    """
+    value = int(text)
+    if value < 0:
+        raise ValueError(f"{text} is negative")
+    return value
+
+
 class CommandParser:
     """A class used to parse and execute a user Command."""
 
-    def __init__(self, video_player):
+    def __init__(self, video_player, metrics=None, profiler=None):
+        """The CommandParser class is initialized.
+
+        Args:
+            video_player: The VideoPlayer the commands are run on.
+            metrics: An optional CommandMetrics to record every command
+                in. It also enables the STATS command, which shows it.
+            profiler: An optional CommandProfiler to run every command
+                through. It also enables the PROFILE command, which
+                starts and stops it.
+        """
         self._player = video_player
+        self._metrics = metrics
+        self._profiler = profiler
+        self._commands = {}
+        self._register_player_commands()
+        if metrics is not None:
+            self.register("STATS", self._show_stats)
+        if profiler is not None:
+            self.register(
+                "PROFILE", self._profile, (1, 2),
+                "Please enter PROFILE START, or PROFILE STOP followed by "
+                "the file to write the profile to.")
+
+    def register(self, name: str, handler: Callable,
+                 arities: Optional[Iterable[int]] = None, usage: str = "",
+                 argument_types: Sequence[Callable] = ()):
+        """Registers a command, replacing any command of the same name.
+
+        Args:
+            name: The command name; matched case-insensitively.
+            handler: Called with the command's arguments.
+            arities: The accepted numbers of arguments. If None, the
+                command takes no arguments and any given are ignored.
+            usage: The message of the CommandException raised when the
+                command is given a number of arguments not in arities, or
+                an argument its type rejects.
+            argument_types: Functions converting each argument by
+                position, raising ValueError for invalid input. Arguments
+                past the end are passed on as strings.
+        """
+        if arities is not None:
+            arities = frozenset(arities)
+        self._commands[name.upper()] = _Command(
+            handler, arities, usage, tuple(argument_types))
+
+    def _register_player_commands(self):
+        player = self._player
+        self.register("NUMBER_OF_VIDEOS", player.number_of_videos)
+        self.register(
+            "SHOW_ALL_VIDEOS", player.show_all_videos, (0, 2),
+            "Please enter SHOW_ALL_VIDEOS command, optionally followed by "
+            "an offset and a limit.",
+            (non_negative_int, non_negative_int))
+        self.register(
+            "PLAY", player.play_video, (1,),
+            "Please enter PLAY command followed by video_id.")
+        self.register("PLAY_RANDOM", player.play_random_video)
+        self.register("STOP", player.stop_video)
+        self.register("PAUSE", player.pause_video)
+        self.register("CONTINUE", player.continue_video)
+        self.register("SHOW_PLAYING", player.show_playing)
+        self.register(
+            "CREATE_PLAYLIST", player.create_playlist, (1,),
+            "Please enter CREATE_PLAYLIST command followed by a "
+            "playlist name.")
+        self.register(
+            "ADD_TO_PLAYLIST", player.add_to_playlist, (2,),
+            "Please enter ADD_TO_PLAYLIST command followed by a "
+            "playlist name and video_id to add.")
+        self.register(
+            "REMOVE_FROM_PLAYLIST", player.remove_from_playlist, (2,),
+            "Please enter REMOVE_FROM_PLAYLIST command followed by a "
+            "playlist name and video_id to remove.")
+        self.register(
+            "CLEAR_PLAYLIST", player.clear_playlist, (1,),
+            "Please enter CLEAR_PLAYLIST command followed by a "
+            "playlist name.")
+        self.register(
+            "DELETE_PLAYLIST", player.delete_playlist, (1,),
+            "Please enter DELETE_PLAYLIST command followed by a "
+            "playlist name.")
+        self.register(
+            "SHOW_PLAYLIST", player.show_playlist, (1, 3),
+            "Please enter SHOW_PLAYLIST command followed by a "
+            "playlist name, and optionally an offset and a limit.",
+            (str, non_negative_int, non_negative_int))
+        self.register(
+            "SHOW_ALL_PLAYLISTS", player.show_all_playlists, (0, 2),
+            "Please enter SHOW_ALL_PLAYLISTS command, optionally followed "
+            "by an offset and a limit.",
+            (non_negative_int, non_negative_int))
+        self.register(
+            "SEARCH_VIDEOS", player.search_videos, (1,),
+            "Please enter SEARCH_VIDEOS command followed by a "
+            "search term.")
+        self.register(
+            "SEARCH_VIDEOS_WITH_TAG", player.search_videos_tag, (1,),
+            "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
+            "video tag.")
+        self.register(
+            "FLAG_VIDEO", player.flag_video, (1, 2),
+            "Please enter FLAG_VIDEO command followed by a "
+            "video_id and an optional flag reason.")
+        self.register(
+            "ALLOW_VIDEO", player.allow_video, (1,),
+            "Please enter ALLOW_VIDEO command followed by a "
+            "video_id.")
+        self.register("HELP", self._get_help)
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
            Raises CommandException if a command cannot be parsed.
         """
+        if self._metrics is None:
+            self._run(command)
+            return
+
+        name = command[0].upper() if command else UNKNOWN
+        if name not in self._commands:
+            name = UNKNOWN
+        start = time.perf_counter()
+        failed = True
+        try:
+            self._run(command)
+            failed = False
+        finally:
+            self._metrics.observe(name, time.perf_counter() - start, failed)
+
+    def _run(self, command):
+        if self._profiler is None:
+            self._execute(command)
+        else:
+            self._profiler.runcall(self._execute, command)
+
+    def _execute(self, command):
         if not command:
             raise CommandException(
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
+        spec = self._commands.get(command[0].upper())
+        try:
+            if spec is None:
+                self._player.output.write(
+                    "Please enter a valid command, type HELP for a list of "
+                    "available commands.", "error")
+            elif spec.arities is None:
+                spec.handler()
+            elif len(command) - 1 in spec.arities:
+                spec.handler(*self._convert(spec, command[1:]))
             else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
-                "Please enter a valid command, type HELP for a list of "
-                "available commands.")
+                raise CommandException(spec.usage)
+        finally:
+            self._player.output.flush()
+
+    @staticmethod
+    def _convert(spec, arguments):
+        converted = list(arguments)
+        try:
+            for position, convert in zip(range(len(converted)),
+                                         spec.argument_types):
+                converted[position] = convert(converted[position])
+        except ValueError:
+            raise CommandException(spec.usage) from None
+        return converted
 
     def _get_help(self):
         """Displays all available commands to the user."""
         help_text = textwrap.dedent("""
         Available commands:
             NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
+            SHOW_ALL_VIDEOS [<offset> <limit>] - Lists all videos from the library, or limit videos after the first offset.
             PLAY <video_id> - Plays specified video.
             PLAY_RANDOM - Plays a random video from the library.
             STOP - Stop the current video.
@@ -151,8 +219,8 @@ class CommandParser:
             REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
             CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
             DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
+            SHOW_PLAYLIST <playlist_name> [<offset> <limit>] - List all the videos in this playlist, or limit videos after the first offset.
+            SHOW_ALL_PLAYLISTS [<offset> <limit>] - Display all the available playlists, or limit playlists after the first offset.
             SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
             SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
             FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
@@ -160,4 +228,35 @@ class CommandParser:
             HELP - Displays help.
             EXIT - Terminates the program execution.
         """)
-        print(help_text)
+        if "STATS" in self._commands:
+            help_text += "    STATS - Shows how often each command ran and how long it took.\n"
+        if "PROFILE" in self._commands:
+            help_text += "    PROFILE START|STOP <file> - Profiles the following commands and writes the profile to file.\n"
+        self._player.output.write(help_text)
+
+    def _show_stats(self):
+        """Displays the command metrics in the Prometheus text format."""
+        self._player.output.write(self._metrics.render().rstrip("\n"))
+
+    def _profile(self, action, path=None):
+        """Starts profiling, or stops it and writes the profile to path."""
+        output = self._player.output
+        action = action.upper()
+        if action == "START" and path is None:
+            if self._profiler.start():
+                output.write("Profiling started")
+            else:
+                output.write("Cannot start profiling: Profiling already started",
+                             "error")
+        elif action == "STOP" and path is not None:
+            try:
+                stopped = self._profiler.stop(path)
+            except OSError as e:
+                raise CommandException(f"Cannot stop profiling: {e}") from None
+            if stopped is None:
+                output.write("Cannot stop profiling: Profiling not started",
+                             "error")
+            else:
+                output.write(f"Profiled {stopped[1]} commands into {stopped[0]}")
+        else:
+            raise CommandException(self._commands["PROFILE"].usage)
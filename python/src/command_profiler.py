@@ -0,0 +1,78 @@
+"""Profiling of commands on demand.
+
+While profiling is started, every command is run under cProfile; the
+time between commands is not profiled. Stopping writes the collected
+statistics as a pstats file, to be read with:
+
+    python3 -m pstats youtube.prof
+"""
+import cProfile
+from pathlib import Path
+
+
+class CommandProfiler:
+    """A class used to profile a window of commands.
+
+    One profiler may be shared by every CommandParser in a process, so a
+    window started from one session covers the commands of all of them.
+    """
+
+    def __init__(self, directory=None):
+        """The CommandProfiler class is initialized.
+
+        Args:
+            directory: If given, statistics may only be written to this
+                directory: the file names passed to stop() are taken
+                relative to it and stripped of any directory part.
+        """
+        self._directory = None if directory is None else Path(directory)
+        self._profile = None
+        self._commands = 0
+
+    @property
+    def active(self):
+        """Returns True if profiling is started."""
+        return self._profile is not None
+
+    def start(self):
+        """Starts profiling the following commands.
+
+        Returns:
+            False if profiling was already started.
+        """
+        if self._profile is not None:
+            return False
+        self._profile = cProfile.Profile()
+        self._commands = 0
+        return True
+
+    def stop(self, path):
+        """Stops profiling and writes the statistics collected.
+
+        Args:
+            path: The pstats file to write.
+
+        Returns:
+            The path written to and the number of commands profiled, or
+            None if profiling was not started.
+
+        Raises:
+            OSError: If the file cannot be written. Profiling then goes
+                on, so it can be stopped again with another path.
+        """
+        if self._profile is None:
+            return None
+        path = Path(path)
+        if self._directory is not None:
+            path = self._directory / path.name
+        self._profile.dump_stats(path)
+        self._profile = None
+        return path, self._commands
+
+    def runcall(self, function, *args):
+        """Calls function, under the profiler if profiling is started."""
+        profile = self._profile
+        if profile is None:
+            return function(*args)
+        self._commands += 1
+        return profile.runcall(function, *args)
@@ -0,0 +1,173 @@
+"""A flag registry class."""
+
+
+class FlagRegistry:
+    """A class used to track which videos of a library are flagged.
+
+    The reasons are kept by video id; a bitset over the video ordinals is
+    kept alongside them, so checking a video costs one byte lookup and
+    filtering a list of videos costs nothing while no video is flagged.
+
+    The videos that are not flagged are also kept as the front of a dense
+    array, so one can be picked at random in O(1). That array is the
+    library's array of video ids (see VideoLibrary.position) with a few
+    entries swapped: flagging a video swaps it with the last eligible one,
+    and only the swapped entries are stored, so the registry never copies
+    the library's array and stays as small as the number of flags.
+    """
+
+    def __init__(self, library):
+        """The FlagRegistry class is initialized.
+
+        Args:
+            library: The VideoLibrary the flagged videos belong to.
+        """
+        self._library = library
+        self._reasons = {}
+        self._bits = bytearray()
+        # position -> video id, and back, for the swapped entries
+        self._moved = {}
+        self._moved_to = {}
+        self._version = library.version
+
+    def __len__(self):
+        return len(self._reasons)
+
+    def __contains__(self, video_id):
+        return video_id in self._reasons
+
+    def reason(self, video_id):
+        """Returns the reason a video was flagged for, or None."""
+        return self._reasons.get(video_id)
+
+    def flag(self, video, reason):
+        """Flags a video, replacing the reason if it already is.
+
+        Args:
+            video: The Video object to flag.
+            reason: Why the video was flagged.
+        """
+        self._sync()
+        if video.video_id not in self._reasons:
+            self._swap(video.video_id, self._eligible_count() - 1)
+        self._reasons[video.video_id] = reason
+        self._set_bit(video.ordinal)
+
+    def allow(self, video):
+        """Removes the flag from a video.
+
+        Returns:
+            True if the video was flagged.
+        """
+        self._sync()
+        if video.video_id not in self._reasons:
+            return False
+        self._swap(video.video_id, self._eligible_count())
+        del self._reasons[video.video_id]
+        self._clear_bit(video.ordinal)
+        return True
+
+    def is_flagged(self, video):
+        """Returns True if the video is flagged."""
+        if not self._reasons:
+            return False
+        self._sync()
+        byte = video.ordinal >> 3
+        return (byte < len(self._bits)
+                and bool(self._bits[byte] & (1 << (video.ordinal & 7))))
+
+    def unflagged(self, videos):
+        """Returns the videos that are not flagged, in the same order."""
+        if not self._reasons:
+            return list(videos)
+        self._sync()
+        bits, size = self._bits, len(self._bits)
+        return [video for video in videos
+                if video.ordinal >> 3 >= size
+                or not bits[video.ordinal >> 3] & (1 << (video.ordinal & 7))]
+
+    def random_video(self, rng):
+        """Picks a video that is not flagged, in O(1).
+
+        Args:
+            rng: The random.Random instance to pick with.
+
+        Returns:
+            A Video object, or None if every video is flagged.
+        """
+        self._sync()
+        count = self._eligible_count()
+        if count == 0:
+            return None
+        return self._library.get_video(self._id_at(rng.randrange(count)))
+
+    def reasons(self):
+        """Returns a dict of the flagged video ids and their reasons."""
+        return dict(self._reasons)
+
+    def set_reasons(self, reasons):
+        """Replaces every flag, skipping videos not in the library.
+
+        Args:
+            reasons: A mapping of video ids to the reasons they are flagged.
+        """
+        self._reasons = dict(reasons)
+        self._version = None
+        self._sync()
+
+    def _sync(self):
+        """Rebuilds the bitset if videos were added to or removed from the
+        library since it was built, as they may have new ordinals."""
+        if self._version == self._library.version:
+            return
+        self._version = self._library.version
+        self._bits = bytearray()
+        self._moved = {}
+        self._moved_to = {}
+        reasons, self._reasons = self._reasons, {}
+        for video_id, reason in reasons.items():
+            video = self._library.get_video(video_id)
+            if video is not None:
+                self._swap(video_id, self._eligible_count() - 1)
+                self._reasons[video_id] = reason
+                self._set_bit(video.ordinal)
+
+    def _eligible_count(self):
+        return len(self._library.get_all_videos()) - len(self._reasons)
+
+    def _position(self, video_id):
+        position = self._moved_to.get(video_id)
+        if position is None:
+            position = self._library.position(video_id)
+        return position
+
+    def _id_at(self, position):
+        video_id = self._moved.get(position)
+        if video_id is None:
+            video_id = self._library.video_id_at(position)
+        return video_id
+
+    def _swap(self, video_id, position):
+        """Moves a video to position and the video there to its place."""
+        other = self._id_at(position)
+        self._place(other, self._position(video_id))
+        self._place(video_id, position)
+
+    def _place(self, video_id, position):
+        previous = self._moved_to.pop(video_id, None)
+        if self._moved.get(previous) == video_id:
+            del self._moved[previous]
+        if self._library.video_id_at(position) != video_id:
+            self._moved[position] = video_id
+            self._moved_to[video_id] = position
+
+    def _set_bit(self, ordinal):
+        byte = ordinal >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        self._bits[byte] |= 1 << (ordinal & 7)
+
+    def _clear_bit(self, ordinal):
+        byte = ordinal >> 3
+        if byte < len(self._bits):
+            self._bits[byte] &= ~(1 << (ordinal & 7)) & 0xFF
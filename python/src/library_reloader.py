@@ -0,0 +1,137 @@
+"""Hot reloading of the video catalog.
+
+A LibraryReloader watches the catalog file and, when it changes, loads
+it into a new VideoLibrary in a background thread, builds its indexes
+and only then swaps it in. The background thread never touches the
+library in use, so a command keeps reading the library it started with;
+players move to the new one between commands (see
+VideoPlayer.set_library). Deltas applied to the library in use (see
+VideoLibrary.apply_delta) must be applied by the thread serving the
+commands, between commands, and are lost at the next reload.
+
+A change is only picked up once the file has looked the same for two
+checks in a row, so a file being rewritten in place is not loaded half
+written. A file replaced by a rename (write a new file, then os.replace
+it over the old one) is complete as soon as it appears, so a change of
+inode is picked up by the first check; that is also the safest way to
+replace the catalog.
+Libraries are always loaded eagerly: a lazy library memory-maps its
+file, and rewriting that file under it could crash the process.
+"""
+import os
+import threading
+from pathlib import Path
+
+from .video_library import VideoLibrary
+
+
+class LibraryReloader:
+    """A class used to keep a VideoLibrary up to date with its file."""
+
+    def __init__(self, videos_file=None):
+        """The LibraryReloader class is initialized, loading the catalog.
+
+        Args:
+            videos_file: The catalog to load and watch, in any format
+                VideoLibrary accepts. Defaults to the bundled videos.txt.
+        """
+        if videos_file is None:
+            videos_file = Path(__file__).parent / "videos.txt"
+        self._videos_file = videos_file
+        self._lock = threading.Lock()
+        self._builder = None
+        self._watcher = None
+        self._stopped = threading.Event()
+        self._error = None
+        self._stamp = self._file_stamp()
+        # The stamp seen by the last check, while it differs from _stamp.
+        self._changed_stamp = None
+        self._library = VideoLibrary(videos_file=videos_file)
+
+    @property
+    def library(self):
+        """Returns the most recently loaded library."""
+        return self._library
+
+    @property
+    def error(self):
+        """Returns the exception of the last failed reload, or None."""
+        return self._error
+
+    def _file_stamp(self):
+        status = os.stat(self._videos_file)
+        return status.st_ino, status.st_mtime_ns, status.st_size
+
+    def check(self):
+        """Starts reloading in the background if the file has been
+        replaced, or has changed and not changed again since the previous
+        check.
+
+        Returns immediately; the current library stays in use until the
+        new one is ready. A file that fails to load is retried once it
+        changes again.
+
+        Returns:
+            True if a reload was started.
+        """
+        with self._lock:
+            if self._builder is not None:
+                return False
+            try:
+                stamp = self._file_stamp()
+            except OSError:
+                # The file is being replaced; look again next time.
+                return False
+            if stamp == self._stamp:
+                self._changed_stamp = None
+                return False
+            if stamp[0] == self._stamp[0] and stamp != self._changed_stamp:
+                # Still being written, perhaps; wait for the next check.
+                self._changed_stamp = stamp
+                return False
+            self._stamp = stamp
+            self._changed_stamp = None
+            self._builder = threading.Thread(
+                target=self._build, name="library-reload", daemon=True)
+            self._builder.start()
+            return True
+
+    def _build(self):
+        try:
+            library = VideoLibrary(videos_file=self._videos_file)
+            library.build_indexes()
+        except Exception as e:
+            self._error = e
+        else:
+            self._error = None
+            self._library = library
+        finally:
+            with self._lock:
+                self._builder = None
+
+    def wait(self):
+        """Waits for a reload in progress, if any, to finish."""
+        builder = self._builder
+        if builder is not None:
+            builder.join()
+
+    def watch(self, interval=1.0):
+        """Checks the file for changes every interval seconds, in a
+        background thread, until close() is called."""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while not self._stopped.wait(interval):
+                self.check()
+
+        self._watcher = threading.Thread(
+            target=poll, name="library-watch", daemon=True)
+        self._watcher.start()
+
+    def close(self):
+        """Stops watching the file and waits for any reload to finish."""
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        self.wait()
@@ -0,0 +1,104 @@
+"""Output sinks that video player messages are written to.
+
+A sink receives every line a command prints through write(), and
+flush() once the command has finished (or before asking the user a
+question). Along with its text, each line is given a kind and the videos
+it is about, for sinks that pass results on to programs:
+
+    error       the command could not do what was asked
+    video       one video of a listing or of search results
+    playlist    one playlist of a listing
+    heading     the first line of a listing, or a line saying it is empty
+    question    a question about the results just listed
+    playing     a video starts, pauses, continues or is shown as playing
+    stopped     a video stops
+    playlists   a playlist is created, changed or deleted
+    flags       a video is flagged or allowed again
+    info        anything else, such as counts and help
+"""
+import sys
+from typing import NamedTuple, Tuple
+
+from .video import Video
+
+
+class Message(NamedTuple):
+    """One line of output, as kept by a ResultSink."""
+
+    kind: str
+    text: str
+    videos: Tuple[Video, ...] = ()
+
+    @property
+    def video_ids(self):
+        """Returns the ids of the videos the line is about."""
+        return [video.video_id for video in self.videos]
+
+
+class StdoutSink:
+    """Prints every line as soon as it is written."""
+
+    def write(self, text, kind="info", videos=()):
+        """Writes one line of output."""
+        print(text)
+
+    def flush(self):
+        """Does nothing; lines have already been printed."""
+
+
+class BufferedSink:
+    """Collects lines and writes them to a stream in one call on flush."""
+
+    def __init__(self, stream=None):
+        """The BufferedSink class is initialized.
+
+        Args:
+            stream: The text stream to flush to. Defaults to whatever
+                sys.stdout is at the time of the flush.
+        """
+        self._stream = stream
+        self._lines = []
+
+    def write(self, text, kind="info", videos=()):
+        """Writes one line of output."""
+        self._lines.append(text)
+
+    def flush(self):
+        """Writes the collected lines to the stream."""
+        if self._lines:
+            stream = sys.stdout if self._stream is None else self._stream
+            self._lines.append("")
+            stream.write("\n".join(self._lines))
+            self._lines.clear()
+
+
+class ResultSink:
+    """Keeps the messages for a programmatic caller to collect."""
+
+    def __init__(self):
+        """The ResultSink class is initialized."""
+        self._messages = []
+
+    def write(self, text, kind="info", videos=()):
+        """Writes one line of output.
+
+        Args:
+            text: The line, as it would be printed.
+            kind: What the line reports; see the module docstring.
+            videos: The Video objects the line is about.
+        """
+        self._messages.append(Message(kind, text, tuple(videos)))
+
+    def flush(self):
+        """Does nothing; messages are kept until they are taken."""
+
+    def take_messages(self):
+        """Returns the messages written since the last take and forgets
+        them."""
+        messages = self._messages
+        self._messages = []
+        return messages
+
+    def take(self):
+        """Returns the lines written since the last take and forgets them."""
+        return [message.text for message in self.take_messages()]
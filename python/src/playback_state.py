@@ -0,0 +1,81 @@
+"""A playback state class."""
+
+from collections import deque
+
+_HISTORY_SIZE = 100
+
+
+class PlaybackState:
+    """A class used to track what a video player is currently showing.
+
+    Every operation is constant time, no matter how large the library is.
+    """
+
+    def __init__(self, history_size=_HISTORY_SIZE):
+        """The PlaybackState class is initialized.
+
+        Args:
+            history_size: How many previously played videos to remember.
+        """
+        self._video = None
+        self._paused = False
+        self._history = deque(maxlen=history_size)
+
+    @property
+    def video(self):
+        """Returns the current (playing or paused) video, or None."""
+        return self._video
+
+    @property
+    def is_paused(self):
+        """Returns True if the current video is paused."""
+        return self._paused
+
+    @property
+    def history(self):
+        """Returns the previously played videos, most recent last."""
+        return tuple(self._history)
+
+    def play(self, video):
+        """Starts playing video, stopping the current one.
+
+        Returns:
+            The video that was stopped, or None.
+        """
+        previous = self.stop()
+        self._video = video
+        return previous
+
+    def stop(self):
+        """Stops the current video.
+
+        Returns:
+            The video that was stopped, or None.
+        """
+        video = self._video
+        if video is not None:
+            self._history.append(video)
+        self._video = None
+        self._paused = False
+        return video
+
+    def pause(self):
+        """Pauses the current video."""
+        self._paused = self._video is not None
+
+    def resume(self):
+        """Resumes the current video."""
+        self._paused = False
+
+    def restore(self, video, paused, history):
+        """Replaces the whole state, e.g. with one saved earlier.
+
+        Args:
+            video: The current video, or None.
+            paused: Whether the current video is paused.
+            history: The previously played videos, most recent last.
+        """
+        self._video = video
+        self._paused = paused and video is not None
+        self._history.clear()
+        self._history.extend(history)
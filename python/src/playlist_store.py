@@ -0,0 +1,158 @@
+"""A persistent playlist store.
+
+Playlist changes are appended to a write-ahead log, one operation per
+line, written the same way as the command that made it:
+
+    CREATE_PLAYLIST my_playlist
+    ADD_TO_PLAYLIST my_playlist amazing_cats_video_id
+
+Operations are committed in groups, with one write and fsync per group.
+A group is committed once it is full, or once its oldest operation has
+waited max_delay seconds; run_script checks that after every command,
+and run_interactive commits after every command. The log is rewritten
+from the current state once it has grown to several times the size of
+that state.
+"""
+import os
+import time
+from pathlib import Path
+
+_CREATE = "CREATE_PLAYLIST"
+_ADD = "ADD_TO_PLAYLIST"
+_REMOVE = "REMOVE_FROM_PLAYLIST"
+_CLEAR = "CLEAR_PLAYLIST"
+_DELETE = "DELETE_PLAYLIST"
+
+
+class PlaylistStore:
+    """A class used to persist the playlists of a video player."""
+
+    def __init__(self, path, group_size=64, max_delay=0.05, compact_ratio=4,
+                 compact_min_records=1024):
+        """The PlaylistStore class is initialized, replaying its log.
+
+        Args:
+            path: The log file; created if it does not exist.
+            group_size: How many operations to collect before committing
+                them with one write and fsync.
+            max_delay: How many seconds an operation may wait for its group
+                to fill up before commit_due() commits it.
+            compact_ratio: Compact once the log holds this many times more
+                records than the current state needs.
+            compact_min_records: Never compact smaller logs than this.
+        """
+        self._path = Path(path)
+        self._group_size = group_size
+        self._max_delay = max_delay
+        self._compact_ratio = compact_ratio
+        self._compact_min_records = compact_min_records
+        # key -> (name, insertion-ordered dict of video ids)
+        self._playlists = {}
+        self._log_records = 0
+        self._pending = []
+        # When the oldest pending operation was recorded.
+        self._pending_since = None
+        self._replay()
+        self._log = open(self._path, "a", encoding="utf-8")
+
+    def _replay(self):
+        if not self._path.exists():
+            return
+        valid_size = 0
+        with open(self._path, "rb") as log:
+            for line in log:
+                # A line without its newline is a write torn by a crash.
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(line.decode("utf-8").split())
+                self._log_records += 1
+                valid_size += len(line)
+        if valid_size != self._path.stat().st_size:
+            os.truncate(self._path, valid_size)
+
+    def _apply(self, operation):
+        if len(operation) < 2:
+            return
+        name, arguments = operation[1], operation[2:]
+        key = name.lower()
+        if operation[0] == _CREATE:
+            self._playlists[key] = (name, {})
+        elif key not in self._playlists:
+            return
+        elif operation[0] == _DELETE:
+            del self._playlists[key]
+        elif operation[0] == _CLEAR:
+            self._playlists[key][1].clear()
+        elif operation[0] == _ADD and arguments:
+            self._playlists[key][1][arguments[0]] = None
+        elif operation[0] == _REMOVE and arguments:
+            self._playlists[key][1].pop(arguments[0], None)
+
+    def playlists(self):
+        """Yields the (name, video ids) of every stored playlist."""
+        for name, video_ids in self._playlists.values():
+            yield name, list(video_ids)
+
+    def record(self, operation, *arguments):
+        """Records a playlist change.
+
+        The change is durable once the group it belongs to is committed:
+        when the group is full, or by commit_due() or commit().
+
+        Args:
+            operation: The command name, e.g. ADD_TO_PLAYLIST.
+            arguments: The playlist name, then the video id if any.
+        """
+        self._apply((operation,) + arguments)
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(" ".join((operation,) + arguments) + "\n")
+        if len(self._pending) >= self._group_size:
+            self.commit()
+        else:
+            self.commit_due()
+
+    def commit_due(self):
+        """Commits the pending changes if the oldest of them has waited
+        max_delay seconds or more."""
+        if (self._pending
+                and time.monotonic() - self._pending_since >= self._max_delay):
+            self.commit()
+
+    def commit(self):
+        """Writes and fsyncs every recorded change not yet committed."""
+        if not self._pending:
+            return
+        self._log.write("".join(self._pending))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_records += len(self._pending)
+        self._pending.clear()
+        if (self._log_records >= self._compact_min_records
+                and self._log_records > self._compact_ratio * self._size()):
+            self.compact()
+
+    def _size(self):
+        return sum(1 + len(video_ids)
+                   for _, video_ids in self._playlists.values())
+
+    def compact(self):
+        """Rewrites the log with just the operations the state needs."""
+        self.commit()
+        self._log.close()
+        compacted = self._path.with_name(self._path.name + ".tmp")
+        with open(compacted, "w", encoding="utf-8") as log:
+            for name, video_ids in self._playlists.values():
+                log.write(f"{_CREATE} {name}\n")
+                log.writelines(f"{_ADD} {name} {video_id}\n"
+                               for video_id in video_ids)
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(compacted, self._path)
+        self._log_records = self._size()
+        self._log = open(self._path, "a", encoding="utf-8")
+
+    def close(self):
+        """Commits any pending changes and closes the log."""
+        self.commit()
+        self._log.close()
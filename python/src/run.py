@@ -1,21 +1,154 @@
 """A youtube terminal simulator."""
+import argparse
+import contextlib
+import os
+import sys
+
+from .command_profiler import CommandProfiler
+from .output_sink import BufferedSink
+from .playlist_store import PlaylistStore
+from .snapshot import load_snapshot, save_snapshot
 from .video_player import VideoPlayer
 from .command_parser import CommandException
 from .command_parser import CommandParser
 
+# Scripts are read and their output written in chunks of this many bytes.
+_SCRIPT_BUFFER_SIZE = 1 << 20
 
-if __name__ == "__main__":
+# If set, every command of the run is profiled into the file it names.
+PROFILE_ENV = "YOUTUBE_PROFILE"
+
+
+@contextlib.contextmanager
+def _keeping_state(video_player, state_file):
+    """Restores the player from state_file, if it exists, and saves the
+    player's state to it when the block exits."""
+    if state_file is None:
+        yield
+        return
+    if os.path.exists(state_file):
+        load_snapshot(video_player, state_file)
+    try:
+        yield
+    finally:
+        save_snapshot(video_player, state_file)
+
+
+@contextlib.contextmanager
+def _profiling(profiler):
+    """Profiles every command run in the block if PROFILE_ENV is set."""
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        yield
+        return
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop(path)
+
+
+def run_interactive(playlist_store=None, state_file=None, seed=None):
+    """Reads commands typed by the user until EXIT.
+
+    Args:
+        playlist_store: An optional PlaylistStore keeping the playlists.
+        state_file: An optional snapshot file to restore the player from
+            and to save its state to on exit.
+        seed: Seeds the player's random number generator.
+    """
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
-    while True:
-        command = input("YT> ")
-        if command.upper() == "EXIT":
-            break
-        try:
-            parser.execute_command(command.split())
-        except CommandException as e:
-            print(e)
+    video_player = VideoPlayer(playlist_store=playlist_store, seed=seed)
+    profiler = CommandProfiler()
+    parser = CommandParser(video_player, profiler=profiler)
+    with _keeping_state(video_player, state_file), _profiling(profiler):
+        while True:
+            command = input("YT> ")
+            if command.upper() == "EXIT":
+                break
+            try:
+                parser.execute_command(command.split())
+            except CommandException as e:
+                print(e)
+            finally:
+                # The user waits for each command anyway, so make its
+                # changes durable before reading the next one.
+                if playlist_store is not None:
+                    playlist_store.commit()
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
+
+
+def run_script(lines, output, playlist_store=None, state_file=None,
+               seed=None):
+    """Runs commands non-interactively until EXIT or the end of the input.
+
+    Blank lines are skipped. When a command asks a question, such as which
+    search result to play, the next line is read as the answer.
+
+    Args:
+        lines: An iterable of command lines, e.g. an open file.
+        output: The text stream all command output is written to.
+        playlist_store: An optional PlaylistStore keeping the playlists.
+        state_file: An optional snapshot file to restore the player from
+            and to save its state to at the end.
+        seed: Seeds the player's random number generator.
+    """
+    lines = iter(lines)
+    video_player = VideoPlayer(prompt=lambda: next(lines, "").strip(),
+                               output=BufferedSink(output),
+                               playlist_store=playlist_store, seed=seed)
+    profiler = CommandProfiler()
+    parser = CommandParser(video_player, profiler=profiler)
+    with _keeping_state(video_player, state_file), _profiling(profiler):
+        for line in lines:
+            command = line.split()
+            if not command:
+                continue
+            if line.strip().upper() == "EXIT":
+                break
+            try:
+                parser.execute_command(command)
+            except CommandException as e:
+                output.write(f"{e}\n")
+            finally:
+                if playlist_store is not None:
+                    playlist_store.commit_due()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--script", metavar="FILE",
+        help="run the commands in FILE (- for stdin) without prompting")
+    arg_parser.add_argument(
+        "--playlists", metavar="FILE",
+        help="load playlists from and save every change to FILE")
+    arg_parser.add_argument(
+        "--state", metavar="FILE",
+        help="restore the player from the snapshot in FILE, if it exists, "
+             "and save a snapshot to FILE on exit")
+    arg_parser.add_argument(
+        "--seed", type=int,
+        help="seed the random number generator used by PLAY_RANDOM")
+    args = arg_parser.parse_args()
+    with contextlib.ExitStack() as stack:
+        playlist_store = None
+        if args.playlists is not None:
+            playlist_store = PlaylistStore(args.playlists)
+            stack.callback(playlist_store.close)
+        if args.script is None:
+            run_interactive(playlist_store, args.state, args.seed)
+        else:
+            if args.script == "-":
+                script = stack.enter_context(open(
+                    sys.stdin.fileno(), buffering=_SCRIPT_BUFFER_SIZE,
+                    closefd=False))
+            else:
+                script = stack.enter_context(open(
+                    args.script, buffering=_SCRIPT_BUFFER_SIZE))
+            output = stack.enter_context(open(
+                sys.stdout.fileno(), "w", buffering=_SCRIPT_BUFFER_SIZE,
+                closefd=False))
+            run_script(script, output, playlist_store, args.state, args.seed)
@@ -0,0 +1,260 @@
+"""A youtube simulator server for many concurrent users.
+
+Every connection gets its own session (a VideoPlayer and CommandParser)
+over one VideoLibrary shared by the whole process. Clients send one
+command per line and receive the command's output followed by the
+"YT> " prompt.
+
+Every command is counted and timed in one CommandMetrics shared by all
+sessions; the STATS command shows it in the Prometheus text format.
+Started with --reload, the server watches the catalog file and swaps in
+a new library whenever it changes (see src.library_reloader).
+Started with --profile-dir, the server also accepts PROFILE START and
+PROFILE STOP <file>, to profile the commands of every session for a
+while and write the profile to that directory. Started with --delta-dir,
+it accepts APPLY_DELTA <file> to apply a delta file from that directory
+to the library (see VideoLibrary.apply_delta). Deltas are applied on the
+event loop, between commands, and every session sees them from its next
+command on.
+
+Sessions are not interactive: search results are listed without waiting
+for an answer, and clients play a result with PLAY <video_id>.
+
+To run the server:
+
+    python3 -m src.server --port 8023
+    python3 -m src.server --unix /tmp/youtube.sock
+"""
+import argparse
+import asyncio
+import itertools
+from pathlib import Path
+
+from .command_metrics import CommandMetrics
+from .command_parser import CommandException
+from .command_parser import CommandParser
+from .command_profiler import CommandProfiler
+from .library_reloader import LibraryReloader
+from .output_sink import ResultSink
+from .video_library import VideoLibrary
+from .video_player import VideoPlayer
+from .video_player import shared_library
+
+GREETING = ("Hello and welcome to YouTube, what would you like to do?\n"
+            "    Enter HELP for list of available commands or EXIT to "
+            "terminate.\n")
+PROMPT = "YT> "
+FAREWELL = "YouTube has now terminated its execution. Thank you and goodbye!\n"
+
+
+def _no_answer():
+    return ""
+
+
+class Session:
+    """A class used to represent one user's connection to the server."""
+
+    def __init__(self, library, seed=None, metrics=None, profiler=None,
+                 reloader=None, delta_dir=None):
+        """The Session class is initialized.
+
+        Args:
+            library: The VideoLibrary shared by every session.
+            seed: Seeds the session's random number generator.
+            metrics: An optional CommandMetrics to record commands in.
+            profiler: An optional CommandProfiler to run commands through.
+            reloader: An optional LibraryReloader; before each command
+                the session moves to its latest library.
+            delta_dir: If given, enables the APPLY_DELTA command for the
+                delta files in this directory.
+
+        Sessions also refresh their videos before a command when deltas
+        were applied to their library since the last one.
+        """
+        self._output = ResultSink()
+        self._reloader = reloader
+        self._player = VideoPlayer(library, prompt=_no_answer,
+                                   output=self._output, seed=seed)
+        self._parser = CommandParser(self._player, metrics, profiler)
+        self._library_version = library.version
+        self._delta_dir = None
+        if delta_dir is not None:
+            self._delta_dir = Path(delta_dir)
+            self._parser.register(
+                "APPLY_DELTA", self._apply_delta, (1,),
+                "Please enter APPLY_DELTA command followed by the name of "
+                "a delta file.")
+
+    def _apply_delta(self, file_name):
+        """Applies a delta file from the delta directory to the library."""
+        path = self._delta_dir / Path(file_name).name
+        try:
+            changed, removed = self._player.library.apply_delta(path)
+        except (OSError, ValueError) as e:
+            raise CommandException(f"Cannot apply delta: {e}") from None
+        self._output.write(f"Applied delta {path.name}: {changed} videos "
+                           f"added or replaced, {removed} removed")
+
+    def _refresh(self):
+        library = (self._player.library if self._reloader is None
+                   else self._reloader.library)
+        if (library is not self._player.library
+                or library.version != self._library_version):
+            self._player.set_library(library)
+            self._library_version = library.version
+
+    def execute(self, line):
+        """Runs one command line and returns everything it printed.
+
+        Errors are reported in the output; they never end the session.
+        """
+        try:
+            self._refresh()
+            self._parser.execute_command(line.split())
+        except CommandException as e:
+            self._output.write(str(e), "error")
+        except Exception as e:
+            self._output.write(
+                f"Cannot run command: {type(e).__name__}: {e}", "error")
+        lines = self._output.take()
+        lines.append("")
+        return "\n".join(lines)
+
+
+async def _read_line(reader):
+    """Reads the next line, including its newline.
+
+    Returns:
+        The line; at the end of the stream, whatever is left of it (empty
+        if nothing is). None if the line was longer than the stream's
+        buffer limit, in which case all of it has been discarded.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError:
+        pass
+    # Drop everything up to the end of the line, one buffer at a time, so
+    # the rest of the line is not taken for the next command.
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as e:
+            await reader.read(e.consumed)
+
+
+async def _serve_connection(session, reader, writer):
+    writer.write((GREETING + PROMPT).encode())
+    try:
+        while True:
+            line = await _read_line(reader)
+            if line is None:
+                reply = "Cannot run command: Line is too long\n"
+            else:
+                if not line or line.strip().upper() == b"EXIT":
+                    break
+                try:
+                    reply = session.execute(line.decode())
+                except UnicodeDecodeError:
+                    reply = "Cannot run command: Line is not valid UTF-8\n"
+            writer.write((reply + PROMPT).encode())
+            await writer.drain()
+        writer.write(FAREWELL.encode())
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(library=None, host="127.0.0.1", port=8023,
+                       unix_path=None, seed=None, metrics=None,
+                       profiler=None, reloader=None, delta_dir=None):
+    """Starts accepting connections and returns the asyncio server.
+
+    Args:
+        library: The VideoLibrary shared by every session. Defaults to the
+            process-wide shared library.
+        host: The interface to listen on.
+        port: The TCP port to listen on, 0 to pick a free one.
+        unix_path: If given, listen on this Unix socket instead of TCP.
+        seed: If given, the n-th session's random number generator is
+            seeded with seed + n, so load tests can be replayed exactly.
+        metrics: An optional CommandMetrics shared by every session.
+        profiler: An optional CommandProfiler shared by every session.
+        reloader: An optional LibraryReloader to take the library from,
+            instead of library.
+        delta_dir: If given, enables the APPLY_DELTA command for the delta
+            files in this directory.
+    """
+    if reloader is not None:
+        library = reloader.library
+    elif library is None:
+        library = shared_library()
+    # Lazy libraries, such as every compiled catalog, build their indexes
+    # on the first search; build them now rather than on the event loop,
+    # where the first search would hold up every session.
+    library.build_indexes()
+    sessions = itertools.count()
+
+    async def serve_connection(reader, writer):
+        session_seed = None if seed is None else seed + next(sessions)
+        await _serve_connection(
+            Session(library, session_seed, metrics, profiler, reloader,
+                    delta_dir),
+            reader, writer)
+
+    if unix_path is not None:
+        return await asyncio.start_unix_server(serve_connection, unix_path)
+    return await asyncio.start_server(serve_connection, host, port)
+
+
+async def _main(args):
+    library = None
+    reloader = None
+    if args.reload is not None:
+        reloader = LibraryReloader(args.videos)
+        reloader.watch(args.reload)
+    elif args.videos is not None:
+        library = VideoLibrary(videos_file=args.videos)
+    server = await start_server(library, host=args.host, port=args.port,
+                                unix_path=args.unix, seed=args.seed,
+                                metrics=None if args.no_metrics
+                                else CommandMetrics(),
+                                profiler=None if args.profile_dir is None
+                                else CommandProfiler(args.profile_dir),
+                                reloader=reloader, delta_dir=args.delta_dir)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8023)
+    arg_parser.add_argument("--unix", metavar="PATH",
+                            help="listen on a Unix socket instead of TCP")
+    arg_parser.add_argument("--videos", metavar="FILE",
+                            help="the catalog to serve, in the videos.txt "
+                                 "or compiled format")
+    arg_parser.add_argument("--reload", type=float, metavar="SECONDS",
+                            help="check the catalog for changes every "
+                                 "SECONDS and reload it when it changes")
+    arg_parser.add_argument("--delta-dir", metavar="DIR",
+                            help="enable the APPLY_DELTA command for the "
+                                 "delta files in DIR")
+    arg_parser.add_argument("--seed", type=int,
+                            help="seed the sessions' random number generators")
+    arg_parser.add_argument("--no-metrics", action="store_true",
+                            help="do not count and time commands")
+    arg_parser.add_argument("--profile-dir", metavar="DIR",
+                            help="enable the PROFILE command, writing "
+                                 "profiles to DIR")
+    try:
+        asyncio.run(_main(arg_parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
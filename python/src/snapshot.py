@@ -0,0 +1,35 @@
+"""Snapshots of video player state.
+
+A snapshot is a small header followed by the pickled state of a player
+(see VideoPlayer.get_state). It is written atomically and read back with
+a single read. Snapshots are pickles: only restore files you wrote.
+"""
+import os
+import pickle
+from pathlib import Path
+
+MAGIC = b"YTSNAP01"
+
+
+def save_snapshot(player, path):
+    """Writes the state of player to path, replacing it atomically."""
+    path = Path(path)
+    data = MAGIC + pickle.dumps(player.get_state(), pickle.HIGHEST_PROTOCOL)
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "wb") as snapshot_file:
+        snapshot_file.write(data)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(partial, path)
+
+
+def load_snapshot(player, path):
+    """Restores the state of player from a snapshot written to path.
+
+    Raises:
+        ValueError: If the file is not a snapshot.
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a video player snapshot")
+    player.set_state(pickle.loads(data[len(MAGIC):]))
@@ -0,0 +1,115 @@
+"""A tag index class."""
+
+import bisect
+import heapq
+
+
+def _intersect(first, second):
+    """Returns the ids present in both sorted posting lists."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] == second[j]:
+            result.append(first[i])
+            i += 1
+            j += 1
+        elif first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _union(postings):
+    """Returns the ids present in any of the sorted posting lists."""
+    result = []
+    for video_id in heapq.merge(*postings):
+        if not result or result[-1] != video_id:
+            result.append(video_id)
+    return result
+
+
+class TagIndex:
+    """A mapping from lowercase tags to sorted lists of video ids."""
+
+    def __init__(self):
+        """The TagIndex class is initialized."""
+        self._postings = {}
+
+    def __contains__(self, tag):
+        return tag.lower() in self._postings
+
+    def add(self, video_id, tags):
+        """Adds a video to the posting list of each of its tags.
+
+        Args:
+            video_id: The video url.
+            tags: The tags of the video.
+        """
+        for tag in tags:
+            posting = self._postings.setdefault(tag.lower(), [])
+            position = bisect.bisect_left(posting, video_id)
+            if position == len(posting) or posting[position] != video_id:
+                posting.insert(position, video_id)
+
+    def extend(self, videos):
+        """Adds many videos at once, e.g. a whole catalog being loaded.
+
+        The ids are appended to the posting lists, which are then sorted
+        once each, so the cost does not depend on the order of the ids as
+        it does when calling add() for each video.
+
+        Args:
+            videos: An iterable of (video id, tags) pairs.
+        """
+        changed = set()
+        for video_id, tags in videos:
+            for tag in tags:
+                tag = tag.lower()
+                self._postings.setdefault(tag, []).append(video_id)
+                changed.add(tag)
+        for tag in changed:
+            self._postings[tag] = sorted(set(self._postings[tag]))
+
+    def remove(self, video_id, tags):
+        """Removes a video from the posting list of each of its tags.
+
+        Args:
+            video_id: The video url.
+            tags: The tags the video was added with.
+        """
+        for tag in tags:
+            posting = self._postings.get(tag.lower())
+            if not posting:
+                continue
+            position = bisect.bisect_left(posting, video_id)
+            if position < len(posting) and posting[position] == video_id:
+                del posting[position]
+            if not posting:
+                del self._postings[tag.lower()]
+
+    def search(self, tag):
+        """Returns the sorted ids of the videos tagged with tag.
+
+        Args:
+            tag: The (case-insensitive) tag, including its leading '#'.
+        """
+        return list(self._postings.get(tag.lower(), ()))
+
+    def search_all(self, tags):
+        """Returns the sorted ids of the videos tagged with every tag."""
+        postings = sorted(
+            (self._postings.get(tag.lower(), []) for tag in tags), key=len)
+        if not postings:
+            return []
+        result = list(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result = _intersect(result, posting)
+        return result
+
+    def search_any(self, tags):
+        """Returns the sorted ids of the videos tagged with any tag."""
+        return _union(
+            self._postings.get(tag.lower(), []) for tag in tags)
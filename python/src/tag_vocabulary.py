@@ -0,0 +1,43 @@
+"""A tag vocabulary class."""
+
+from array import array
+
+# Tag ids are stored as unsigned shorts while they fit, and as unsigned
+# ints for videos with a tag past the first 65536 of the vocabulary.
+_MAX_SHORT = 0xFFFF
+
+
+class TagVocabulary:
+    """A table of distinct tags, each identified by a small integer id."""
+
+    def __init__(self):
+        """The TagVocabulary class is initialized."""
+        self._tags = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._tags)
+
+    def __getitem__(self, tag_id):
+        return self._tags[tag_id]
+
+    def intern(self, tag):
+        """Returns the id of tag, adding it to the vocabulary if needed."""
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            tag_id = self._ids[tag] = len(self._tags)
+            self._tags.append(tag)
+        return tag_id
+
+    def encode(self, tags):
+        """Returns the ids of tags as an array of unsigned shorts, or of
+        unsigned ints if an id does not fit in a short."""
+        tag_ids = [self.intern(tag) for tag in tags]
+        if tag_ids and max(tag_ids) > _MAX_SHORT:
+            return array("I", tag_ids)
+        return array("H", tag_ids)
+
+    def decode(self, tag_ids):
+        """Returns the tags with the given ids as a tuple of strings."""
+        tags = self._tags
+        return tuple(tags[tag_id] for tag_id in tag_ids)
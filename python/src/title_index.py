@@ -0,0 +1,92 @@
+"""A title search index class."""
+
+# The substrings of _MIN_GRAM_SIZE to _GRAM_SIZE characters (bigrams and
+# trigrams) are indexed: a term of that length is answered by a single lookup
+# and longer terms by intersecting the posting lists of their trigrams. The
+# bigram postings cost about as much as the trigram ones. Single characters
+# are not indexed, as each one's postings would hold a large share of the
+# catalog; single-character terms are answered by scanning the titles, which
+# costs O(catalog) per search.
+_MIN_GRAM_SIZE = 2
+_GRAM_SIZE = 3
+
+
+def _grams(text):
+    """Returns every distinct substring of text of length _MIN_GRAM_SIZE
+    to _GRAM_SIZE."""
+    return {text[start:start + size]
+            for size in range(_MIN_GRAM_SIZE, _GRAM_SIZE + 1)
+            for start in range(len(text) - size + 1)}
+
+
+class TitleIndex:
+    """A case-insensitive substring index over video titles."""
+
+    def __init__(self):
+        """The TitleIndex class is initialized."""
+        self._postings = {}
+        self._titles = {}
+
+    def __len__(self):
+        return len(self._titles)
+
+    def add(self, video_id, title):
+        """Indexes the title of a video.
+
+        Args:
+            video_id: The video url.
+            title: The title of the video.
+        """
+        folded = title.lower()
+        self._titles[video_id] = folded
+        for gram in _grams(folded):
+            self._postings.setdefault(gram, set()).add(video_id)
+
+    def remove(self, video_id):
+        """Removes a video from the index, if present.
+
+        Args:
+            video_id: The video url.
+        """
+        folded = self._titles.pop(video_id, None)
+        if folded is None:
+            return
+        for gram in _grams(folded):
+            posting = self._postings[gram]
+            posting.discard(video_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, term):
+        """Returns the ids of the videos whose titles contain term.
+
+        Args:
+            term: The (case-insensitive) substring to look for.
+
+        Returns:
+            A set of video ids, in no particular order.
+        """
+        term = term.lower()
+        if len(term) < _MIN_GRAM_SIZE:
+            return {video_id for video_id, title in self._titles.items()
+                    if term in title}
+        if len(term) <= _GRAM_SIZE:
+            return set(self._postings.get(term, ()))
+
+        postings = []
+        for start in range(len(term) - _GRAM_SIZE + 1):
+            posting = self._postings.get(term[start:start + _GRAM_SIZE])
+            if not posting:
+                return set()
+            postings.append(posting)
+
+        # Intersect starting from the rarest gram, then drop the candidates
+        # whose grams appear in the wrong order.
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {video_id for video_id in candidates
+                if term in self._titles[video_id]}
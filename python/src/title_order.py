@@ -0,0 +1,39 @@
+"""A title order class."""
+
+import bisect
+
+
+class TitleOrder:
+    """Video ids kept sorted by title (and by id among equal titles)."""
+
+    def __init__(self, videos=()):
+        """The TitleOrder class is initialized.
+
+        Args:
+            videos: The initial (title, video_id) pairs, in any order.
+        """
+        self._keys = sorted(videos)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, title, video_id):
+        """Inserts a video at its place in title order."""
+        bisect.insort(self._keys, (title, video_id))
+
+    def remove(self, title, video_id):
+        """Removes a video; does nothing if it is not present."""
+        key = (title, video_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def video_ids(self, offset=0, limit=None):
+        """Returns the ids of up to limit videos after the first offset.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The most ids to return, or None for all of them.
+        """
+        end = None if limit is None else offset + limit
+        return [video_id for _, video_id in self._keys[offset:end]]
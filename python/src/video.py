@@ -1,49 +1,71 @@
 """A video class."""
 
-from typing import Sequence
+from typing import Optional, Sequence
+
+from .tag_vocabulary import TagVocabulary
+from .video_table import VideoTable
 
 
 class Video:
-    """A class used to represent a Video."""
+    """A class used to represent a Video.
+
+    A Video is a view of one row of a VideoTable, where the video's data
+    is kept; libraries create one whenever a video is requested.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str],
+                 vocabulary: Optional[TagVocabulary] = None):
+        """Video constructor, for a video outside of any library.
 
-    def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
-        """Video constructor."""
-        self._title = video_title
-        self._video_id = video_id
+        Args:
+            video_title: The title of the video.
+            video_id: The video url.
+            video_tags: The tags of the video.
+            vocabulary: The vocabulary the tags are interned in.
+        """
+        # The tags are copied into the table, so they cannot be changed by
+        # the caller changing the 'video_tags' they passed to us
+        self._table = VideoTable(vocabulary)
+        self._row = self._table.append(video_title, video_id, video_tags)
 
-        # Turn the tags into a tuple here so it's unmodifiable,
-        # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
+    @classmethod
+    def view(cls, table: VideoTable, row: int) -> "Video":
+        """Returns a Video reading the given row of a table."""
+        video = object.__new__(cls)
+        video._table = table
+        video._row = row
+        return video
 
-        # Excel
-        self._is_playing = False
+    def __eq__(self, other):
+        # Every request makes a new view, so compare the rows they read.
+        return (isinstance(other, Video) and self._table is other._table
+                and self._row == other._row)
 
-        self._is_flagged = False
+    def __hash__(self):
+        return hash((id(self._table), self._row))
 
     @property
     def title(self) -> str:
         """Returns the title of a video."""
-        return self._title
+        return self._table.title(self._row)
 
     @property
     def video_id(self) -> str:
         """Returns the video id of a video."""
-        return self._video_id
+        return self._table.video_id(self._row)
 
     @property
     def tags(self) -> Sequence[str]:
         """Returns the list of tags of a video."""
-        return self._tags
+        return self._table.tags(self._row)
 
-    # Excel
-    def get_playing_state(self):
-        return self._is_playing
-
-    def set_playing_state(self, state):
-        self._is_playing = state
-
-    def get_flag(self):
-        return self._is_flagged
+    @property
+    def ordinal(self) -> int:
+        """Returns the row of a video in its table.
 
-    def set_flag(self, flag: bool):
-        self._is_flagged = flag
+        Rows are small integers that are never reused within a library, so
+        per-video state can be kept in bitsets indexed by them.
+        """
+        return self._row
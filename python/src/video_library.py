@@ -1,8 +1,16 @@
 """A video library class."""
 
+from .catalog import CompiledCatalog, is_compiled
 from .video import Video
+from .video_table import VideoTable
+from .tag_index import TagIndex
+from .title_index import TitleIndex
+from .title_order import TitleOrder
 from pathlib import Path
 import csv
+import itertools
+import mmap
+import os
 
 
 # Helper Wrapper around CSV reader to strip whitespace from around
@@ -11,26 +19,361 @@ def _csv_reader_with_strip(reader):
     yield from ((item.strip() for item in line) for line in reader)
 
 
+def _decode(field):
+    return str(field, "utf-8").strip()
+
+
+def _parse_tags(tags):
+    return [tag.strip() for tag in tags.split(",")] if tags else []
+
+
+class _MappedVideoFile:
+    """Read-only, memory-mapped access to the rows of a videos.txt file.
+
+    Only the byte offset of each row is kept; rows are split into
+    memoryview slices of the mapping and decoded when they are read.
+    """
+
+    def __init__(self, path):
+        self._offsets = {}
+        self._mapping = None
+        self._view = None
+        with open(path, "rb") as video_file:
+            if os.fstat(video_file.fileno()).st_size == 0:
+                return
+            self._mapping = mmap.mmap(
+                video_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mapping)
+
+        offset = 0
+        while offset < len(self._mapping):
+            end = self._row_end(offset)
+            _, url, _ = self._row_fields(offset, end)
+            if url is not None:
+                self._offsets[_decode(url)] = offset
+            offset = end + 1
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __contains__(self, video_id):
+        return video_id in self._offsets
+
+    def _row_end(self, offset):
+        end = self._mapping.find(b"\n", offset)
+        return len(self._mapping) if end < 0 else end
+
+    def _row_fields(self, offset, end=None):
+        """Splits the row starting at offset into its title, url and tags.
+
+        The fields are memoryview slices of the mapped file; nothing is
+        copied or decoded. url and tags are None for a malformed row.
+        """
+        mapping = self._mapping
+        if end is None:
+            end = self._row_end(offset)
+        first = mapping.find(b"|", offset, end)
+        second = mapping.find(b"|", first + 1, end) if first >= 0 else -1
+        if second < 0:
+            return self._view[offset:end], None, None
+        return (self._view[offset:first],
+                self._view[first + 1:second],
+                self._view[second + 1:end])
+
+    def row(self, video_id):
+        """Returns the (title, url, tags) of a video, or None if missing."""
+        offset = self._offsets.get(video_id)
+        if offset is None:
+            return None
+        title, url, tags = self._row_fields(offset)
+        return _decode(title), _decode(url), _parse_tags(_decode(tags))
+
+    def rows(self):
+        """Yields the (title, url, tags) of every video in file order."""
+        # The url is already known from the offset table, so only the title
+        # and tags fields are decoded.
+        for url, offset in self._offsets.items():
+            title, _, tags = self._row_fields(offset)
+            yield _decode(title), url, _parse_tags(_decode(tags))
+
+
+class _VideoView:
+    """A read-only view of the videos in a library.
+
+    Videos are produced one at a time while iterating, so no list of the
+    whole catalog is built.
+    """
+
+    def __init__(self, library):
+        self._library = library
+
+    def __len__(self):
+        return self._library._count()
+
+    def __iter__(self):
+        library = self._library
+        return (library.get_video(video_id)
+                for video_id in library._iter_ids())
+
+
 class VideoLibrary:
     """A class used to represent a Video Library."""
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
-        self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+    def __init__(self, lazy=False, videos_file=None):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            lazy: If True, videos.txt is memory-mapped read-only and only
+                the byte offset of each row is recorded at load time; a
+                Video is decoded from the mapping the first time it is
+                requested and the search indexes are built on the first
+                search. Processes that map the same file share one page
+                cached copy of it.
+            videos_file: The catalog to load, either in the videos.txt
+                format or compiled with src.catalog. Compiled catalogs are
+                always loaded lazily. Defaults to the bundled videos.txt.
+        """
+        if videos_file is None:
+            videos_file = Path(__file__).parent / "videos.txt"
+        # Every video is kept in one table, whose row numbers serve as the
+        # videos' ordinals; a lazy library copies a row from its source the
+        # first time the video is requested.
+        self._table = VideoTable()
+        self._source = None
+        # Changes made to a lazily loaded library after it was loaded: the
+        # ids added since and the ids of the source rows that were removed
+        # or replaced.
+        self._added = {}
+        self._removed = set()
+        self._title_index = None
+        self._tag_index = None
+        self._title_order = None
+        # _version counts the videos added and removed.
+        self._version = 0
+        # A dense array of every video id and each id's index in it, built
+        # on first use and kept dense by swap-remove, for O(1) random picks.
+        self._ids = None
+        self._positions = None
+        if is_compiled(videos_file):
+            self._source = CompiledCatalog(videos_file)
+        elif lazy:
+            self._source = _MappedVideoFile(videos_file)
+        else:
+            self._load_videos(videos_file)
+
+    def _load_videos(self, videos_file):
+        self._title_index = TitleIndex()
+        self._tag_index = TagIndex()
+        titles = []
+        replaced = []
+
+        def rows(reader):
+            # The rows are streamed into the table and every index at
+            # once, so the indexes share the strings parsed here.
+            for title, url, tags in reader:
+                tags = _parse_tags(tags)
+                if self._table.remove(url) is not None:
+                    replaced.append(url)
+                self._table.append(title, url, tags)
+                self._title_index.add(url, title)
+                titles.append((title, url))
+                yield url, tags
+
+        with open(videos_file) as video_file:
+            self._tag_index.extend(rows(_csv_reader_with_strip(
+                csv.reader(video_file, delimiter="|"))))
+        self._title_order = TitleOrder(titles)
+        if replaced:
+            # A later row replaced an earlier one with the same id; index
+            # the rows left from scratch.
+            self._title_index = None
+            self._ensure_indexes()
+
+    @property
+    def version(self):
+        """Returns a number that changes whenever videos are added or removed."""
+        return self._version
+
+    def _count(self):
+        if self._source is None:
+            return len(self._table)
+        return len(self._source) - len(self._removed) + len(self._added)
+
+    def _iter_ids(self):
+        if self._source is None:
+            return iter(self._table)
+        return itertools.chain(
+            (video_id for video_id in self._source
+             if video_id not in self._removed),
+            self._added)
+
+    def _ensure_positions(self):
+        if self._ids is None:
+            self._ids = list(self._iter_ids())
+            self._positions = {video_id: position
+                               for position, video_id in enumerate(self._ids)}
+
+    def position(self, video_id):
+        """Returns the index of a video in the dense array of video ids.
+
+        Positions run from 0 to the number of videos; they change when
+        videos are removed (see version).
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The position of the video, or None if it does not exist.
+        """
+        self._ensure_positions()
+        return self._positions.get(video_id)
+
+    def video_id_at(self, position):
+        """Returns the id of the video at a position, see position()."""
+        self._ensure_positions()
+        return self._ids[position]
+
+    def build_indexes(self):
+        """Builds the search indexes and title order now, if they are not
+        built yet, instead of on the first search."""
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        if self._title_index is not None:
+            return
+        title_index = TitleIndex()
+        tag_index = TagIndex()
+        titles = []
+        tagged = []
+        if self._source is None:
+            rows = self._table.rows()
+        else:
+            rows = itertools.chain(
+                (row for row in self._source.rows()
+                 if row[1] not in self._removed),
+                (self._table_row(video_id) for video_id in self._added))
+        for title, url, tags in rows:
+            title_index.add(url, title)
+            tagged.append((url, tags))
+            titles.append((title, url))
+        tag_index.extend(tagged)
+        self._title_order = TitleOrder(titles)
+        self._title_index = title_index
+        self._tag_index = tag_index
+
+    def add_video(self, video_title, video_id, video_tags):
+        """Adds a video to the library, replacing any with the same id.
+
+        The search indexes and title order are updated incrementally.
+
+        Args:
+            video_title: The title of the video.
+            video_id: The video url.
+            video_tags: The tags of the video.
+
+        Returns:
+            The new Video object.
+        """
+        self.remove_video(video_id)
+        video = Video.view(self._table, self._table.append(
+            video_title, video_id, video_tags))
+        self._version += 1
+        if self._source is not None:
+            self._added[video_id] = None
+        if self._ids is not None:
+            self._positions[video_id] = len(self._ids)
+            self._ids.append(video_id)
+        if self._title_index is not None:
+            self._title_index.add(video_id, video.title)
+            self._tag_index.add(video_id, video.tags)
+            self._title_order.add(video.title, video_id)
+        return video
+
+    def remove_video(self, video_id):
+        """Removes a video from the library.
+
+        The search indexes and title order are updated incrementally.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The removed Video object. None if the video does not exist.
+        """
+        video = self.get_video(video_id)
+        if video is None:
+            return None
+        self._table.remove(video_id)
+        self._version += 1
+        if self._source is not None:
+            self._added.pop(video_id, None)
+            if video_id in self._source:
+                self._removed.add(video_id)
+        if self._ids is not None:
+            position = self._positions.pop(video_id)
+            last = self._ids.pop()
+            if last != video_id:
+                self._ids[position] = last
+                self._positions[last] = position
+        if self._title_index is not None:
+            self._title_index.remove(video_id)
+            self._tag_index.remove(video_id, video.tags)
+            self._title_order.remove(video.title, video_id)
+        return video
+
+    def apply_delta(self, delta_file):
+        """Applies a file of catalog changes to the library.
+
+        The file is in the videos.txt format. Each row adds the video, or
+        replaces the video with the same id; a row with an empty title
+        removes the video with its id; blank rows are skipped. Only the
+        changed videos are touched, so the cost is that of the delta, not
+        of the catalog. The whole file is parsed before any change is made.
+
+        The library is changed in place: in a server, apply deltas from
+        the thread that runs the commands, between commands.
+
+        Args:
+            delta_file: The path of the delta file.
+
+        Returns:
+            The number of videos added or replaced, and the number of
+            videos removed.
+
+        Raises:
+            ValueError: If a row does not have three fields.
+        """
+        with open(delta_file) as video_file:
+            reader = csv.reader(video_file, delimiter="|")
+            rows = []
+            for number, row in enumerate(reader, start=1):
+                row = [field.strip() for field in row]
+                if not any(row):
+                    continue
+                if len(row) != 3:
+                    raise ValueError(
+                        f"{delta_file}:{number}: expected title | id | tags")
+                rows.append(row)
+
+        changed = removed = 0
+        for title, url, tags in rows:
+            if title:
+                self.add_video(title, url, _parse_tags(tags))
+                changed += 1
+            elif self.remove_video(url) is not None:
+                removed += 1
+        return changed, removed
 
     def get_all_videos(self):
-        """Returns all available video information from the video library."""
-        return list(self._videos.values())
+        """Returns all available video information from the video library.
+
+        Returns:
+            A sized, iterable view of the Video objects in the library.
+        """
+        return _VideoView(self)
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
@@ -42,4 +385,88 @@ class VideoLibrary:
             The Video object for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
+        row = self._table.find(video_id)
+        if row is None:
+            row = self._copy_row(video_id)
+            if row is None:
+                return None
+        return Video.view(self._table, row)
+
+    def _copy_row(self, video_id):
+        """Copies a video from the source into the table, returning its
+        row, or None if the source does not have it."""
+        if self._source is None or video_id in self._removed:
+            return None
+        source_row = self._source.row(video_id)
+        return None if source_row is None else self._table.append(*source_row)
+
+    def _table_row(self, video_id):
+        row = self._table.find(video_id)
+        return (self._table.title(row), video_id, self._table.tags(row))
+
+    def get_videos_by_title(self, offset=0, limit=None):
+        """Returns videos in title order, without sorting the library.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The most videos to return, or None for all of them.
+
+        Returns:
+            A list of Video objects, sorted by title and id.
+        """
+        self._ensure_indexes()
+        return [self.get_video(video_id)
+                for video_id in self._title_order.video_ids(offset, limit)]
+
+    def search_videos(self, search_term):
+        """Returns the videos whose titles contain the search term.
+
+        Args:
+            search_term: The case-insensitive substring to look for.
+
+        Returns:
+            A list of the matching Video objects, sorted by title and id.
+        """
+        self._ensure_indexes()
+        return self._sorted_by_title(self._title_index.search(search_term))
+
+    def search_videos_with_tag(self, video_tag):
+        """Returns the videos tagged with the given tag.
+
+        Args:
+            video_tag: The case-insensitive tag, including its leading '#'.
+
+        Returns:
+            A list of the matching Video objects, sorted by title and id.
+        """
+        self._ensure_indexes()
+        return self._sorted_by_title(self._tag_index.search(video_tag))
+
+    def search_videos_with_tags(self, video_tags, match_all=True):
+        """Returns the videos tagged with all (or any) of the given tags.
+
+        Args:
+            video_tags: The case-insensitive tags to look for.
+            match_all: If True, a video needs every tag to match, otherwise
+                any one of them is enough.
+
+        Returns:
+            A list of the matching Video objects, sorted by title and id.
+        """
+        self._ensure_indexes()
+        if match_all:
+            video_ids = self._tag_index.search_all(video_tags)
+        else:
+            video_ids = self._tag_index.search_any(video_tags)
+        return self._sorted_by_title(video_ids)
+
+    def _sorted_by_title(self, video_ids):
+        table = self._table
+        rows = []
+        for video_id in video_ids:
+            row = table.find(video_id)
+            if row is None:
+                row = self._copy_row(video_id)
+            rows.append((table.title(row), video_id, row))
+        rows.sort()
+        return [Video.view(table, row) for _, _, row in rows]
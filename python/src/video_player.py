@@ -1,37 +1,163 @@
 """A video player class."""
+import bisect
+import functools
 import random
 
+from .flag_registry import FlagRegistry
+from .output_sink import StdoutSink
+from .playback_state import PlaybackState
 from .video_library import VideoLibrary
+from .video_playlist import Playlist
 
 
-# function key for sorting list of videos
-def sort_by_title(video):
-    return video.title
+# formats a video the way every listing displays it
+def video_details(video):
+    return f"{video.title} ({video.video_id}) [{' '.join(video.tags)}]"
 
 
-library = VideoLibrary()
-library_videos = library.get_all_videos()
-current_video = None
-playlists = {}  # will probably be a dictionary of lists
+@functools.lru_cache(maxsize=None)
+def shared_library():
+    """Returns the VideoLibrary shared by players created without one."""
+    return VideoLibrary()
 
 
 class VideoPlayer:
-    """A class used to represent a Video Player."""
+    """A class used to represent a Video Player.
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
+    A player holds the state of one user session (playback, playlists and
+    flagged videos) on top of a library that may be shared by any number of players.
+    """
+
+    def __init__(self, library=None, prompt=None, output=None,
+                 playlist_store=None, seed=None):
+        """The VideoPlayer class is initialized.
+
+        Args:
+            library: The VideoLibrary to play videos from. The player only
+                reads it, so one library can back many players. Defaults
+                to the process-wide shared library.
+            prompt: A function called with no arguments to read the answer
+                to a question, such as which search result to play.
+                Defaults to input().
+            output: The sink every message is written to. Defaults to a
+                StdoutSink, which prints each message straight away.
+            playlist_store: A PlaylistStore to load the playlists from and
+                to record every playlist change in. Videos no longer in
+                the library are dropped from loaded playlists.
+            seed: Seeds the player's own random number generator, so the
+                videos picked by PLAY_RANDOM can be reproduced.
+        """
+        self._library = library if library is not None else shared_library()
+        self._prompt = prompt
+        self._output = output if output is not None else StdoutSink()
+        self._playback = PlaybackState()
+        self._flags = FlagRegistry(self._library)
+        self._random = random.Random(seed)
+        self._playlists = {}
+        # The playlist keys in sorted order, so listing a page of them
+        # costs only the size of the page.
+        self._playlist_names = []
+        self._playlist_store = playlist_store
+        if playlist_store is not None:
+            self._set_playlists(playlist_store.playlists())
+
+    def _set_playlists(self, playlists):
+        self._playlists = {}
+        for name, video_ids in playlists:
+            playlist = Playlist(name)
+            for video_id in video_ids:
+                video = self._library.get_video(video_id)
+                if video is not None:
+                    playlist.add(video)
+            self._playlists[playlist.key] = playlist
+        self._playlist_names = sorted(self._playlists)
+
+    def _record(self, operation, *arguments):
+        if self._playlist_store is not None:
+            self._playlist_store.record(operation, *arguments)
+
+    def get_state(self):
+        """Returns the state of the session as plain data.
+
+        Videos are referred to by id, so the state can be saved and later
+        restored over another copy of the library.
+        """
+        playback = self._playback
+        return {
+            "video": None if playback.video is None
+            else playback.video.video_id,
+            "paused": playback.is_paused,
+            "history": [video.video_id for video in playback.history],
+            "playlists": [(playlist.name,
+                           [video.video_id for video in playlist])
+                          for playlist in self._playlists.values()],
+            "flags": self._flags.reasons(),
+        }
+
+    def set_state(self, state):
+        """Replaces the state of the session with one from get_state.
+
+        Videos no longer in the library are dropped. If the player has a
+        playlist store, the store stays the only source of its playlists
+        and the playlists of the state are ignored.
+        """
+        self._restore(state, self._playlist_store is None)
+
+    def _restore(self, state, playlists):
+        get_video = self._library.get_video
+        self._playback.restore(
+            get_video(state["video"]) if state["video"] else None,
+            state["paused"],
+            [video for video in map(get_video, state["history"]) if video])
+        if playlists:
+            self._set_playlists(state["playlists"])
+        self._flags.set_reasons(state.get("flags", {}))
+
+    @property
+    def library(self):
+        """Returns the library the player plays videos from."""
+        return self._library
+
+    def set_library(self, library):
+        """Moves the session to another library, e.g. a reloaded catalog.
+
+        The playing video, history, playlists and flags are kept for the
+        videos whose ids are in the new library and dropped for the rest.
+        The playlist store, if any, is not updated.
+        """
+        state = self.get_state()
+        self._library = library
+        self._flags = FlagRegistry(library)
+        self._restore(state, True)
+
+    @property
+    def output(self):
+        """Returns the sink the player writes its messages to."""
+        return self._output
+
+    def _details(self, video):
+        """Formats a video for a listing, noting if it is flagged."""
+        reason = self._flags.reason(video.video_id)
+        if reason is None:
+            return video_details(video)
+        return f"{video_details(video)} - FLAGGED (reason: {reason})"
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
+        num_videos = len(self._library.get_all_videos())
+        self._output.write(f"{num_videos} videos in the library")
+
+    def show_all_videos(self, offset=0, limit=None):
+        """Returns all videos.
 
-    def show_all_videos(self):
-        """Returns all videos."""
-        print("Here's a list of all available videos:")
-        videos = library_videos
-        videos.sort(key=sort_by_title)
-        for video in videos:
-            print(f"\t{video.title} ({video.video_id}) [{' '.join(video.tags)}]")
+        Args:
+            offset: How many videos (in title order) to skip.
+            limit: The most videos to list, or None for all of them.
+        """
+        self._output.write("Here's a list of all available videos:",
+                           "heading")
+        for video in self._library.get_videos_by_title(offset, limit):
+            self._output.write(f"\t{self._details(video)}", "video",
+                               (video,))
 
     def play_video(self, video_id):
         """Plays the respective video.
@@ -39,98 +165,79 @@ class VideoPlayer:
         Args:
             video_id: The video_id to be played.
         """
-        global current_video
-        video_to_be_played = library.get_video(video_id)
-
-        # getting the current playing video if any
-        for video in library_videos:
-            if video.get_playing_state():
-                current_video = video
-
-        if current_video and video_to_be_played is None:
-            print(f"Cannot play video: Video does not exist")
-
-        elif video_to_be_played is None:
-            print(f"Cannot play video: Video does not exist")
-
-        # checking if there is a current video playing and playing the specified one
-        elif current_video or (current_video and not current_video.get_playing_state()):
-            print(f"Stopping video: {current_video.title}")
-            current_video.set_playing_state(False)
-
-            print(f"Playing video: {video_to_be_played.title}")
-            current_video = video_to_be_played
-            current_video.set_playing_state(True)
-
+        video = self._library.get_video(video_id)
+        if video is None:
+            self._output.write("Cannot play video: Video does not exist", "error")
+        elif self._flags.is_flagged(video):
+            reason = self._flags.reason(video_id)
+            self._output.write(f"Cannot play video: Video is currently flagged (reason: {reason})", "error", (video,))
         else:
-            current_video = video_to_be_played
-            current_video.set_playing_state(True)
-            print(f"Playing video: {video_to_be_played.title}")
+            self._play(video)
+
+    def _play(self, video):
+        stopped = self._playback.play(video)
+        if stopped is not None:
+            self._output.write(f"Stopping video: {stopped.title}",
+                               "stopped", (stopped,))
+        self._output.write(f"Playing video: {video.title}", "playing",
+                           (video,))
 
     def stop_video(self):
         """Stops the current video."""
-        global current_video
-
-        # getting the current playing video if any
-        for video in library.get_all_videos():
-            if video.get_playing_state():
-                current_video = video
-        if current_video:
-            current_video.set_playing_state(False)
-            print(f"Stopping video: {current_video.title}")
-            current_video = None
-
+        stopped = self._playback.stop()
+        if stopped is None:
+            self._output.write("Cannot stop video: No video is currently playing", "error")
         else:
-            print(f"Cannot stop video: No video is currently playing")
+            self._output.write(f"Stopping video: {stopped.title}",
+                               "stopped", (stopped,))
 
     def play_random_video(self):
         """Plays a random video from the video library."""
-        global current_video
-        random_video = random.choice(library_videos)
-
-        if not library_videos:
-            print(f" No videos available")
-        elif current_video:
-            print(f"Stopping video: {current_video.title}")
-            current_video.set_playing_state(False)
-            print(f"Playing video: {random_video.title}")
+        video = self._flags.random_video(self._random)
+        if video is None:
+            self._output.write("No videos available", "error")
         else:
-            current_video = random_video
-            current_video.set_playing_state(True)
-            print(f"Playing video: {random_video.title}")
+            self._play(video)
 
     def pause_video(self):
         """Pauses the current video."""
-
-        global current_video
-        if not current_video:
-            print(f"No video is playing!")
-        elif current_video and not current_video.get_playing_state():
-            print(f"Video already paused: {current_video.title}")
+        video = self._playback.video
+        if video is None:
+            self._output.write("Cannot pause video: No video is currently playing", "error")
+        elif self._playback.is_paused:
+            self._output.write(f"Video already paused: {video.title}",
+                               "error", (video,))
         else:
-            print(f"Pausing video: {current_video.title}")
-            current_video.set_playing_state(False)
+            self._playback.pause()
+            self._output.write(f"Pausing video: {video.title}", "playing",
+                               (video,))
 
     def continue_video(self):
         """Resumes playing the current video."""
-        global current_video
-        if not current_video:
-            print(f"No video is playing!")
-        elif current_video and current_video.get_playing_state():
-            print(f"Current video is not paused!")
+        video = self._playback.video
+        if video is None:
+            self._output.write("Cannot continue video: No video is currently playing", "error")
+        elif not self._playback.is_paused:
+            self._output.write("Cannot continue video: Video is not paused", "error")
         else:
-            print(f"Continuing video{current_video.title}")
-            current_video.set_playing_state(True)
+            self._playback.resume()
+            self._output.write(f"Continuing video: {video.title}",
+                               "playing", (video,))
 
     def show_playing(self):
         """Displays video currently playing."""
-
-        if not current_video:
-            print(f"No video is currently playing")
-        elif current_video and current_video.get_playing_state():
-            print(f"Currently playing: {current_video.title} ({current_video.video_id}) [{' '.join(current_video.tags)}]")
+        video = self._playback.video
+        if video is None:
+            self._output.write("No video is currently playing", "playing")
+        elif self._playback.is_paused:
+            self._output.write(f"Currently playing: {video_details(video)} - PAUSED",
+                               "playing", (video,))
         else:
-            print(f"Currently playing: {current_video.title} ({current_video.video_id}) [{' '.join(current_video.tags)}] - PAUSED")
+            self._output.write(f"Currently playing: {video_details(video)}",
+                               "playing", (video,))
+
+    def _get_playlist(self, playlist_name):
+        return self._playlists.get(playlist_name.lower())
 
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
@@ -139,17 +246,20 @@ class VideoPlayer:
             playlist_name: The playlist name.
         """
         # Checking fot white space in name
-        if ' ' in playlist_name.lower():
-            print(f"Cannot create playlist: {playlist_name} is not a valid name")
+        if ' ' in playlist_name:
+            self._output.write(f"Cannot create playlist: {playlist_name} is not a valid name", "error")
 
         # checking if playlist already exists
-        elif playlist_name.lower() in list(playlists.keys()):
-            print(f"Cannot create playlist: A playlist with the same name already exists")
+        elif self._get_playlist(playlist_name) is not None:
+            self._output.write("Cannot create playlist: A playlist with the same name already exists", "error")
 
         # creating playlist if conditions are met
         else:
-            playlists[playlist_name.lower()] = []
-            print(f"Successfully created new playlist: {playlist_name}")
+            playlist = Playlist(playlist_name)
+            self._playlists[playlist.key] = playlist
+            bisect.insort(self._playlist_names, playlist.key)
+            self._record("CREATE_PLAYLIST", playlist_name)
+            self._output.write(f"Successfully created new playlist: {playlist_name}", "playlists")
 
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
@@ -158,67 +268,58 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be added.
         """
-        video = library.get_video(video_id)
-        playlist = playlist_name.lower() in playlists.keys()
-        # if both video and playlist don't exist
-        if not video and not playlist:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
-            # print(f"Cannot add video to {video}: Video does not exist")
-
-        # if only video exists
-        elif video and not playlist:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
-
-        # if only playlist exists
-        elif playlist and not video:
-            print(f"Cannot add video to {playlist_name}: Video does not exist")
-
-        # if video is already in playlist
-        elif video and playlist and (video in playlists.get(playlist_name.lower())):
-            print(f"Cannot add video to {playlist_name}: Video already added")
-
-        # if both exist
+        playlist = self._get_playlist(playlist_name)
+        video = self._library.get_video(video_id)
+        if playlist is None:
+            self._output.write(f"Cannot add video to {playlist_name}: Playlist does not exist", "error")
+        elif video is None:
+            self._output.write(f"Cannot add video to {playlist_name}: Video does not exist", "error")
+        elif self._flags.is_flagged(video):
+            reason = self._flags.reason(video_id)
+            self._output.write(f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {reason})", "error", (video,))
+        elif not playlist.add(video):
+            self._output.write(f"Cannot add video to {playlist_name}: Video already added", "error", (video,))
         else:
-            playlists[playlist_name.lower()].append(video)
-            print(f"Added new video to {playlist_name}: {video.title}")
+            self._record("ADD_TO_PLAYLIST", playlist.name, video_id)
+            self._output.write(f"Added video to {playlist_name}: {video.title}",
+                               "playlists", (video,))
 
+    def show_all_playlists(self, offset=0, limit=None):
+        """Display all playlists.
 
-    def show_all_playlists(self):
-        """Display all playlists."""
-
-        if not playlists:
-            print("No playlists exist yet")
+        Args:
+            offset: How many playlists (in name order) to skip.
+            limit: The most playlists to list, or None for all of them.
+        """
+        if not self._playlists:
+            self._output.write("No playlists exist yet", "heading")
         else:
-            print("Showing all playlists:")
-            playlist_names = list(playlists.keys())
-            playlist_names.sort()
-            for playlist in playlist_names:
-                print(f"\t{playlist}")  # how to get the original playlist name?
+            self._output.write("Showing all playlists:", "heading")
+            end = None if limit is None else offset + limit
+            for key in self._playlist_names[offset:end]:
+                self._output.write(f"\t{self._playlists[key].name}",
+                                   "playlist")
 
-    def show_playlist(self, playlist_name):
+    def show_playlist(self, playlist_name, offset=0, limit=None):
         """Display all videos in a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
+            offset: How many videos of the playlist to skip.
+            limit: The most videos to list, or None for all of them.
         """
-        # if the playlist does not exist
-        if playlist_name.lower() not in playlists.keys():
-            print(f"Cannot show playlist {playlist_name}: Playlist does not exist")
-
-        # if playlist exists but is empty
-        elif (playlist_name.lower() in playlists) and not playlists.get(playlist_name.lower()):
-            print(f"Showing playlist: {playlist_name}")
-            print(f"\tNo videos here yet")
-
-        # if playlist is not empty
+        playlist = self._get_playlist(playlist_name)
+        if playlist is None:
+            self._output.write(f"Cannot show playlist {playlist_name}: Playlist does not exist", "error")
+            return
+
+        self._output.write(f"Showing playlist: {playlist_name}", "heading")
+        if not playlist:
+            self._output.write("\tNo videos here yet", "heading")
         else:
-            needed_playlist = playlists[playlist_name]
-            for videos in needed_playlist:
-                video_title = videos.title
-                video_id = videos.video_id
-                video_tags = videos.tags
-                print(f"\t{video_title} ({video_id}) [{' '.join(video_tags)}]")
-
+            for video in playlist.videos(offset, limit):
+                self._output.write(f"\t{self._details(video)}", "video",
+                                   (video,))
 
     def remove_from_playlist(self, playlist_name, video_id):
         """Removes a video to a playlist with a given name.
@@ -227,27 +328,18 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be removed.
         """
-        video = library.get_video(video_id)
-        playlist = playlist_name.lower() in playlists.keys()
-
-        # if neither video nor playlist exists
-        if not video and not playlist:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
-
-        # if only video exists
-        elif video and not playlist:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
-
-        # if only playlist exists
-        elif playlist and not video:
-            print(f"Cannot add video to {playlist_name}: Video does not exist")
-
-        # if video and playlist exist but video not in playlist
-        elif video and playlist and (video not in playlists.get(playlist_name.lower())):
-            print(f"Cannot remove video from {playlist_name}: Video is not in playlist")
+        playlist = self._get_playlist(playlist_name)
+        video = self._library.get_video(video_id)
+        if playlist is None:
+            self._output.write(f"Cannot remove video from {playlist_name}: Playlist does not exist", "error")
+        elif video is None:
+            self._output.write(f"Cannot remove video from {playlist_name}: Video does not exist", "error")
+        elif not playlist.remove(video_id):
+            self._output.write(f"Cannot remove video from {playlist_name}: Video is not in playlist", "error", (video,))
         else:
-            playlists.get(playlist_name.lower()).remove(video)
-            print(f"Removed video from {playlist_name}: {video.title}")
+            self._record("REMOVE_FROM_PLAYLIST", playlist.name, video_id)
+            self._output.write(f"Removed video from {playlist_name}: {video.title}",
+                               "playlists", (video,))
 
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
@@ -255,11 +347,13 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        if playlist_name.lower() not in playlists.keys():
-            print(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+        playlist = self._get_playlist(playlist_name)
+        if playlist is None:
+            self._output.write(f"Cannot clear playlist {playlist_name}: Playlist does not exist", "error")
         else:
-            print(f"Successfully removed all videos from {playlist_name}")
-            playlists[playlist_name.lower()].clear()
+            playlist.clear()
+            self._record("CLEAR_PLAYLIST", playlist.name)
+            self._output.write(f"Successfully removed all videos from {playlist_name}", "playlists")
 
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
@@ -267,11 +361,14 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        if playlist_name.lower() not in playlists.keys():
-            print(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+        playlist = self._playlists.pop(playlist_name.lower(), None)
+        if playlist is None:
+            self._output.write(f"Cannot delete playlist {playlist_name}: Playlist does not exist", "error")
         else:
-            playlists.pop(playlist_name.lower())
-            print(f"Deleted playlist: {playlist_name}")
+            del self._playlist_names[bisect.bisect_left(
+                self._playlist_names, playlist.key)]
+            self._record("DELETE_PLAYLIST", playlist.name)
+            self._output.write(f"Deleted playlist: {playlist_name}", "playlists")
 
     def search_videos(self, search_term):
         """Display all the videos whose titles contain the search_term.
@@ -279,13 +376,36 @@ class VideoPlayer:
         Args:
             search_term: The query to be used in search.
         """
-        # I would have used binary search, but since the data is small, I'll use linear  search
-        # video_titles = []
-        # for video in library_videos:
-        #     video_titles.append(video.title)
-        # for title in video_titles:
-        #     if search_term.lower() in video_titles[title].lower():
-        #         print
+        results = self._flags.unflagged(
+            self._library.search_videos(search_term))
+        self._show_search_results(search_term, results)
+
+    def _show_search_results(self, search_term, results):
+        """Lists search results and offers to play one of them.
+
+        Args:
+            search_term: The query the results were found for.
+            results: The matching videos, in display order.
+        """
+        if not results:
+            self._output.write(f"No search results for {search_term}",
+                               "heading")
+            return
+
+        self._output.write(f"Here are the results for {search_term}:",
+                           "heading")
+        for number, video in enumerate(results, start=1):
+            self._output.write(f"\t{number}) {video_details(video)}",
+                               "video", (video,))
+        self._output.write("Would you like to play any of the above? If yes, "
+                           "specify the number of the video.", "question")
+        self._output.write("If your answer is not a valid number, we will "
+                           "assume it's a no.", "question")
+
+        self._output.flush()
+        answer = self._prompt() if self._prompt else input()
+        if answer.isdigit() and 1 <= int(answer) <= len(results):
+            self.play_video(results[int(answer) - 1].video_id)
 
     def search_videos_tag(self, video_tag):
         """Display all videos whose tags contains the provided tag.
@@ -293,7 +413,9 @@ class VideoPlayer:
         Args:
             video_tag: The video tag to be used in search.
         """
-        print("search_videos_tag needs implementation")
+        results = self._flags.unflagged(
+            self._library.search_videos_with_tag(video_tag))
+        self._show_search_results(video_tag, results)
 
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
@@ -302,7 +424,19 @@ class VideoPlayer:
             video_id: The video_id to be flagged.
             flag_reason: Reason for flagging the video.
         """
-        print("flag_video needs implementation")
+        video = self._library.get_video(video_id)
+        if video is None:
+            self._output.write("Cannot flag video: Video does not exist", "error")
+        elif self._flags.is_flagged(video):
+            self._output.write("Cannot flag video: Video is already flagged", "error", (video,))
+        else:
+            playing = self._playback.video
+            if playing is not None and playing.video_id == video_id:
+                self.stop_video()
+            reason = flag_reason or "Not supplied"
+            self._flags.flag(video, reason)
+            self._output.write(f"Successfully flagged video: {video.title} (reason: {reason})",
+                               "flags", (video,))
 
     def allow_video(self, video_id):
         """Removes a flag from a video.
@@ -310,4 +444,11 @@ class VideoPlayer:
         Args:
             video_id: The video_id to be allowed again.
         """
-        print("allow_video needs implementation")
+        video = self._library.get_video(video_id)
+        if video is None:
+            self._output.write("Cannot remove flag from video: Video does not exist", "error")
+        elif not self._flags.allow(video):
+            self._output.write("Cannot remove flag from video: Video is not flagged", "error", (video,))
+        else:
+            self._output.write(f"Successfully removed flag from video: {video.title}",
+                               "flags", (video,))
@@ -1,5 +1,72 @@
 """A video playlist class."""
 
+import itertools
+
 
 class Playlist:
-    """A class used to represent a Playlist."""
+    """A class used to represent a Playlist.
+
+    Videos are kept in the order they were added, keyed by video id, so
+    membership tests, adding and removing a video are all O(1).
+    """
+
+    def __init__(self, name):
+        """The Playlist class is initialized.
+
+        Args:
+            name: The playlist name, as the user typed it when creating it.
+        """
+        self._name = name
+        self._videos = {}
+
+    @property
+    def name(self):
+        """Returns the name the playlist was created with."""
+        return self._name
+
+    @property
+    def key(self):
+        """Returns the case-insensitive key identifying the playlist."""
+        return self._name.lower()
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __iter__(self):
+        return iter(self._videos.values())
+
+    def __contains__(self, video_id):
+        return video_id in self._videos
+
+    def add(self, video):
+        """Appends a video unless it is already in the playlist.
+
+        Returns:
+            True if the video was added.
+        """
+        if video.video_id in self._videos:
+            return False
+        self._videos[video.video_id] = video
+        return True
+
+    def remove(self, video_id):
+        """Removes a video from the playlist.
+
+        Returns:
+            True if the video was in the playlist.
+        """
+        return self._videos.pop(video_id, None) is not None
+
+    def clear(self):
+        """Removes all videos from the playlist."""
+        self._videos.clear()
+
+    def videos(self, offset=0, limit=None):
+        """Returns up to limit videos after the first offset, in order.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The most videos to return, or None for all of them.
+        """
+        end = None if limit is None else offset + limit
+        return list(itertools.islice(self._videos.values(), offset, end))
@@ -0,0 +1,194 @@
+"""A video table class."""
+
+from array import array
+import zlib
+
+from .tag_vocabulary import TagVocabulary
+
+# Hash table slots hold a row number + 1; 0 marks an empty slot and
+# _DELETED one whose video was removed.
+_EMPTY = 0
+_DELETED = 0xFFFFFFFF
+_MAX_SHORT = 0xFFFF
+
+
+class VideoTable:
+    """Videos stored column by column rather than as one object each.
+
+    Titles and ids are utf-8 encoded into one byte pool, the start of each
+    in the pool and of each row's tags are kept in arrays, and tags are
+    kept as vocabulary ids. Ids are found through an open-addressing hash
+    table of row numbers keyed by the crc32 of the id, laid out as in the
+    compiled catalog (see src.catalog). A video costs its title and id in
+    bytes plus about 30 bytes, where a Video object with its strings and
+    dict entry costs several times as much.
+
+    Rows are only ever appended, so a row number identifies a video for
+    as long as the table lives; removing a video unlinks its id but keeps
+    its row, so Video views of it stay readable.
+    """
+
+    def __init__(self, vocabulary=None):
+        """The VideoTable class is initialized.
+
+        Args:
+            vocabulary: The vocabulary the tags are interned in.
+        """
+        self._vocabulary = (TagVocabulary() if vocabulary is None
+                            else vocabulary)
+        self._pool = bytearray()
+        # Per row, the pool offsets of its title, of its id and of the end
+        # of its id.
+        self._offsets = array("I")
+        # Per row, the offset of its first tag id in _tag_refs.
+        self._tag_starts = array("I")
+        self._tag_refs = array("H")
+        self._live = bytearray()
+        self._count = 0
+        self._slots = array("I", bytes(4 * 8))
+        self._used_slots = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Yields the id of every video in the table, in row order."""
+        for row, live in enumerate(self._live):
+            if live:
+                yield self.video_id(row)
+
+    def __contains__(self, video_id):
+        return self.find(video_id) is not None
+
+    def _tag_end(self, row):
+        if row + 1 < len(self._tag_starts):
+            return self._tag_starts[row + 1]
+        return len(self._tag_refs)
+
+    def title(self, row):
+        """Returns the title of the video in a row."""
+        offsets = self._offsets
+        return self._pool[offsets[3 * row]:offsets[3 * row + 1]].decode()
+
+    def video_id(self, row):
+        """Returns the id of the video in a row."""
+        offsets = self._offsets
+        return self._pool[offsets[3 * row + 1]:offsets[3 * row + 2]].decode()
+
+    def tags(self, row):
+        """Returns the tags of the video in a row as a tuple of strings."""
+        return self._vocabulary.decode(
+            self._tag_refs[self._tag_starts[row]:self._tag_end(row)])
+
+    def rows(self):
+        """Yields the (title, url, tags) of every video, in row order."""
+        for row, live in enumerate(self._live):
+            if live:
+                yield self.title(row), self.video_id(row), self.tags(row)
+
+    def _probe(self, encoded):
+        """Returns the slot holding the id, or the first free one."""
+        slots, offsets, pool = self._slots, self._offsets, self._pool
+        mask = len(slots) - 1
+        slot = zlib.crc32(encoded) & mask
+        free = None
+        entry = slots[slot]
+        while entry != _EMPTY:
+            if entry == _DELETED:
+                if free is None:
+                    free = slot
+            elif pool[offsets[3 * entry - 2]:offsets[3 * entry - 1]] == encoded:
+                # entry is the row + 1, so 3 * entry - 2 is the row's id.
+                return slot
+            slot = (slot + 1) & mask
+            entry = slots[slot]
+        return slot if free is None else free
+
+    def find(self, video_id):
+        """Returns the row of a video, or None if it is not in the table."""
+        # The same probe as _probe, without looking for a free slot, as
+        # this is called for every video requested.
+        encoded = video_id.encode()
+        slots, offsets, pool = self._slots, self._offsets, self._pool
+        mask = len(slots) - 1
+        slot = zlib.crc32(encoded) & mask
+        entry = slots[slot]
+        while entry != _EMPTY:
+            if (entry != _DELETED and pool[offsets[3 * entry - 2]:
+                                           offsets[3 * entry - 1]] == encoded):
+                return entry - 1
+            slot = (slot + 1) & mask
+            entry = slots[slot]
+        return None
+
+    def append(self, video_title, video_id, video_tags):
+        """Adds a video in a new row.
+
+        Args:
+            video_title: The title of the video.
+            video_id: The video url, which must not be in the table.
+            video_tags: The tags of the video.
+
+        Returns:
+            The row of the video.
+        """
+        if 2 * (self._used_slots + 1) > len(self._slots):
+            self._resize()
+        encoded = video_id.encode()
+        row = len(self._live)
+        self._offsets.append(len(self._pool))
+        self._pool.extend(video_title.encode())
+        self._offsets.append(len(self._pool))
+        self._pool.extend(encoded)
+        self._offsets.append(len(self._pool))
+        self._tag_starts.append(len(self._tag_refs))
+        tag_ids = [self._vocabulary.intern(tag) for tag in video_tags]
+        if (tag_ids and self._tag_refs.typecode == "H"
+                and max(tag_ids) > _MAX_SHORT):
+            self._tag_refs = array("I", self._tag_refs)
+        self._tag_refs.extend(tag_ids)
+        self._live.append(1)
+        self._count += 1
+
+        slot = self._probe(encoded)
+        if self._slots[slot] == _EMPTY:
+            self._used_slots += 1
+        self._slots[slot] = row + 1
+        return row
+
+    def remove(self, video_id):
+        """Unlinks a video from its id; its row stays readable.
+
+        Returns:
+            The row of the video, or None if it is not in the table.
+        """
+        slot = self._probe(video_id.encode())
+        entry = self._slots[slot]
+        if entry in (_EMPTY, _DELETED):
+            return None
+        self._slots[slot] = _DELETED
+        self._live[entry - 1] = 0
+        self._count -= 1
+        return entry - 1
+
+    def _resize(self):
+        """Rehashes the live rows into a table at least twice their number
+        (plus the one being added), dropping the deleted slots."""
+        size = 8
+        while size < 2 * (self._count + 2):
+            size <<= 1
+        self._slots = slots = array("I", bytes(4 * size))
+        mask = size - 1
+        pool = memoryview(self._pool)
+        try:
+            for row, live in enumerate(self._live):
+                if not live:
+                    continue
+                slot = zlib.crc32(pool[self._offsets[3 * row + 1]:
+                                       self._offsets[3 * row + 2]]) & mask
+                while slots[slot] != _EMPTY:
+                    slot = (slot + 1) & mask
+                slots[slot] = row + 1
+        finally:
+            pool.release()
+        self._used_slots = self._count
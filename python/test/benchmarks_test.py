@@ -0,0 +1,57 @@
+from benchmarks import run
+from benchmarks import synthetic
+from src.command_parser import CommandParser
+from src.output_sink import ResultSink
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_synthetic_catalog_is_reproducible(tmp_path):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    synthetic.write_videos_file(first, 100, seed=3)
+    synthetic.write_videos_file(second, 100, seed=3)
+    assert first.read_text() == second.read_text()
+    library = VideoLibrary(videos_file=first)
+    assert len(library.get_all_videos()) == 100
+    assert library.get_video(synthetic.video_id(99)) is not None
+
+
+def test_measure_times_every_command(tmp_path):
+    path = tmp_path / "videos.txt"
+    synthetic.write_videos_file(path, 200)
+    result = run.measure(path, iterations=3)
+    assert set(result["commands"]) == {verb for verb, _ in run._COMMANDS}
+    for summary in result["commands"].values():
+        assert summary["count"] == 3
+        assert summary["p50_us"] <= summary["p99_us"] <= summary["max_us"]
+
+
+def test_remove_and_allow_undo_the_same_iteration(tmp_path):
+    path = tmp_path / "videos.txt"
+    synthetic.write_videos_file(path, 200)
+    library = VideoLibrary(videos_file=path)
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(library, prompt=lambda: "",
+                                       output=output))
+    parser.execute_command(["CREATE_PLAYLIST", run._PLAYLIST])
+    workload = run._Workload(library, 0)
+    kinds = {"REMOVE_FROM_PLAYLIST": "playlists", "ALLOW_VIDEO": "flags"}
+    for iteration in range(5):
+        for verb, arguments in run._COMMANDS:
+            output.take()
+            parser.execute_command([verb] + arguments(workload, iteration))
+            if verb in kinds:
+                messages = output.take_messages()
+                assert [message.kind for message in messages] == [kinds[verb]]
+
+
+def test_compare_reports_regressions():
+    def report(load_seconds, p50_us):
+        return {"results": [{
+            "size": 1000, "mode": "eager", "load_seconds": load_seconds,
+            "index_seconds": 0.1, "max_rss_kib": 100,
+            "commands": {"PLAY": {"count": 1, "p50_us": p50_us}}}]}
+
+    assert run.compare(report(1.0, 10), report(1.1, 11), 1.25) == []
+    regressions = run.compare(report(1.0, 10), report(1.0, 20), 1.25)
+    assert regressions == ["1000 eager PLAY p50_us: 10 -> 20"]
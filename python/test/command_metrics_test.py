@@ -0,0 +1,51 @@
+import pytest
+
+from src.command_metrics import UNKNOWN, CommandMetrics
+from src.command_parser import CommandException, CommandParser
+from src.output_sink import ResultSink
+from src.video_player import VideoPlayer
+
+
+def test_parser_counts_calls_and_errors():
+    metrics = CommandMetrics()
+    parser = CommandParser(VideoPlayer(output=ResultSink()), metrics)
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["play", "funny_dogs_video_id"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PLAY"])
+    parser.execute_command(["NOT_A_COMMAND"])
+    with pytest.raises(CommandException):
+        parser.execute_command([])
+    assert metrics.calls("PLAY") == 3
+    assert metrics.errors("PLAY") == 1
+    assert metrics.calls(UNKNOWN) == 2
+    assert metrics.errors(UNKNOWN) == 1
+
+
+def test_render_prometheus_histogram():
+    metrics = CommandMetrics()
+    metrics.observe("PLAY", 0.00002)
+    metrics.observe("PLAY", 2.0, failed=True)
+    text = metrics.render()
+    assert 'youtube_commands_total{command="PLAY"} 2\n' in text
+    assert 'youtube_command_errors_total{command="PLAY"} 1\n' in text
+    assert 'youtube_command_seconds_bucket{command="PLAY",le="1e-05"} 0\n' \
+           in text
+    assert 'youtube_command_seconds_bucket{command="PLAY",le="2.5e-05"} 1\n' \
+           in text
+    assert 'youtube_command_seconds_bucket{command="PLAY",le="+Inf"} 2\n' \
+           in text
+    assert 'youtube_command_seconds_count{command="PLAY"} 2\n' in text
+
+
+def test_stats_command_only_with_metrics():
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(output=output), CommandMetrics())
+    parser.execute_command(["NUMBER_OF_VIDEOS"])
+    parser.execute_command(["STATS"])
+    stats = "\n".join(output.take())
+    assert 'youtube_commands_total{command="NUMBER_OF_VIDEOS"} 1' in stats
+
+    parser = CommandParser(VideoPlayer(output=output))
+    parser.execute_command(["STATS"])
+    assert "Please enter a valid command" in output.take()[0]
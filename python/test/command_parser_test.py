@@ -0,0 +1,102 @@
+import io
+
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.output_sink import BufferedSink, ResultSink
+from src.video_player import VideoPlayer
+
+
+def test_commands_are_case_insensitive(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["number_of_videos"])
+    out, err = capfd.readouterr()
+    assert "5 videos in the library" in out
+
+
+def test_wrong_number_of_arguments_raises():
+    parser = CommandParser(VideoPlayer())
+    with pytest.raises(CommandException, match="followed by video_id"):
+        parser.execute_command(["PLAY"])
+
+
+def test_registered_command_is_dispatched():
+    parser = CommandParser(VideoPlayer())
+    calls = []
+    parser.register("ECHO", calls.append, (1,), "ECHO takes one word.")
+    parser.execute_command(["echo", "hello"])
+
+    assert calls == ["hello"]
+    with pytest.raises(CommandException, match="ECHO takes one word."):
+        parser.execute_command(["ECHO"])
+
+
+def test_output_goes_to_the_player_sink():
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(output=output))
+    parser.execute_command(["PLAY", "funny_dogs_video_id"])
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+
+    assert output.take() == ["Playing video: Funny Dogs",
+                             "Stopping video: Funny Dogs",
+                             "Playing video: Amazing Cats"]
+    assert output.take() == []
+
+
+def test_result_sink_keeps_structured_messages():
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(output=output, prompt=lambda: "no"))
+    parser.execute_command(["SEARCH_VIDEOS", "dogs"])
+    parser.execute_command(["PLAY", "missing_video_id"])
+    messages = output.take_messages()
+
+    assert [message.kind for message in messages] == [
+        "heading", "video", "question", "question", "error"]
+    assert messages[1].video_ids == ["funny_dogs_video_id"]
+    assert messages[1].text == \
+        "\t1) Funny Dogs (funny_dogs_video_id) [#dog #animal]"
+    assert messages[4].videos == ()
+
+
+def test_buffered_sink_writes_once_per_command():
+    stream = io.StringIO()
+    writes = []
+    stream.write = writes.append
+    parser = CommandParser(VideoPlayer(output=BufferedSink(stream)))
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+
+    assert len(writes) == 1
+    assert len(writes[0].splitlines()) == 6
+
+
+def test_show_all_videos_page(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["SHOW_ALL_VIDEOS", "1", "2"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 3
+    assert "Another Cat Video (another_cat_video_id)" in lines[1]
+    assert "Funny Dogs (funny_dogs_video_id)" in lines[2]
+
+    with pytest.raises(CommandException, match="offset and a limit"):
+        parser.execute_command(["SHOW_ALL_VIDEOS", "1", "-2"])
+
+
+def test_show_playlist_and_all_playlists_pages(capfd):
+    parser = CommandParser(VideoPlayer())
+    for name in ("c_list", "a_list", "b_list"):
+        parser.execute_command(["CREATE_PLAYLIST", name])
+    for video_id in ("funny_dogs_video_id", "amazing_cats_video_id",
+                     "nothing_video_id"):
+        parser.execute_command(["ADD_TO_PLAYLIST", "a_list", video_id])
+    capfd.readouterr()
+
+    parser.execute_command(["SHOW_ALL_PLAYLISTS", "1", "5"])
+    parser.execute_command(["SHOW_PLAYLIST", "a_list", "1", "1"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 5
+    assert "b_list" in lines[1]
+    assert "c_list" in lines[2]
+    assert "Showing playlist: a_list" in lines[3]
+    assert "Amazing Cats (amazing_cats_video_id)" in lines[4]
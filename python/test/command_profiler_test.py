@@ -0,0 +1,56 @@
+import pstats
+
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.command_profiler import CommandProfiler
+from src.output_sink import ResultSink
+from src.video_player import VideoPlayer
+
+
+def test_profile_window_is_written(tmp_path):
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(prompt=lambda: "", output=output),
+                           profiler=CommandProfiler())
+    path = tmp_path / "commands.prof"
+    parser.execute_command(["PROFILE", "START"])
+    parser.execute_command(["PROFILE", "START"])
+    parser.execute_command(["SEARCH_VIDEOS", "cat"])
+    parser.execute_command(["PROFILE", "STOP", str(path)])
+    parser.execute_command(["PROFILE", "STOP", str(path)])
+    lines = output.take()
+    assert lines[0] == "Profiling started"
+    assert lines[1] == "Cannot start profiling: Profiling already started"
+    assert lines[-2] == f"Profiled 3 commands into {path}"
+    assert lines[-1] == "Cannot stop profiling: Profiling not started"
+
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}
+    assert "search_videos" in functions
+
+
+def test_profile_files_stay_in_the_directory(tmp_path):
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(output=output),
+                           profiler=CommandProfiler(tmp_path))
+    parser.execute_command(["PROFILE", "START"])
+    parser.execute_command(["PROFILE", "STOP", "../../escaped.prof"])
+    assert (tmp_path / "escaped.prof").exists()
+
+
+def test_profile_usage():
+    parser = CommandParser(VideoPlayer(output=ResultSink()),
+                           profiler=CommandProfiler())
+    with pytest.raises(CommandException, match="PROFILE START"):
+        parser.execute_command(["PROFILE", "STOP"])
+
+
+def test_profile_stop_to_a_bad_path_keeps_profiling(tmp_path):
+    output = ResultSink()
+    parser = CommandParser(VideoPlayer(output=output),
+                           profiler=CommandProfiler())
+    parser.execute_command(["PROFILE", "START"])
+    with pytest.raises(CommandException, match="Cannot stop profiling"):
+        parser.execute_command(
+            ["PROFILE", "STOP", str(tmp_path / "missing" / "x.prof")])
+    parser.execute_command(["PROFILE", "STOP", str(tmp_path / "x.prof")])
+    assert (tmp_path / "x.prof").exists()
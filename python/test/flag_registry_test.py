@@ -0,0 +1,73 @@
+import random
+
+from src.flag_registry import FlagRegistry
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_flag_and_allow():
+    library = VideoLibrary()
+    flags = FlagRegistry(library)
+    cats = library.get_video("amazing_cats_video_id")
+    dogs = library.get_video("funny_dogs_video_id")
+    flags.flag(cats, "dont_like_cats")
+    assert flags.is_flagged(cats)
+    assert not flags.is_flagged(dogs)
+    assert flags.reason("amazing_cats_video_id") == "dont_like_cats"
+    assert flags.unflagged([cats, dogs]) == [dogs]
+    assert flags.allow(cats)
+    assert not flags.allow(cats)
+    assert not flags.is_flagged(cats)
+    assert flags.unflagged([cats, dogs]) == [cats, dogs]
+
+
+def test_flags_follow_replaced_videos():
+    library = VideoLibrary()
+    flags = FlagRegistry(library)
+    flags.flag(library.get_video("amazing_cats_video_id"), "dont_like_cats")
+    flags.flag(library.get_video("funny_dogs_video_id"), "dont_like_dogs")
+    replaced = library.add_video("Amazing Cats 2", "amazing_cats_video_id",
+                                 ["#cat"])
+    library.remove_video("funny_dogs_video_id")
+    assert flags.is_flagged(replaced)
+    assert flags.reasons() == {"amazing_cats_video_id": "dont_like_cats"}
+
+
+def test_set_reasons_skips_missing_videos():
+    library = VideoLibrary()
+    flags = FlagRegistry(library)
+    flags.set_reasons({"nothing_video_id": "boring", "gone_video_id": "x"})
+    assert flags.is_flagged(library.get_video("nothing_video_id"))
+    assert flags.reasons() == {"nothing_video_id": "boring"}
+
+
+def test_random_video_never_picks_flagged_videos():
+    library = VideoLibrary()
+    flags = FlagRegistry(library)
+    rng = random.Random(0)
+    video_ids = [video.video_id for video in library.get_all_videos()]
+    flagged = set()
+    for step in range(200):
+        video = library.get_video(rng.choice(video_ids))
+        if video.video_id in flagged:
+            flags.allow(video)
+            flagged.discard(video.video_id)
+        else:
+            flags.flag(video, "reason")
+            flagged.add(video.video_id)
+        eligible = {flags._id_at(position)
+                    for position in range(len(video_ids) - len(flagged))}
+        assert eligible == set(video_ids) - flagged
+        picked = flags.random_video(rng)
+        assert (picked is None) == (len(flagged) == len(video_ids))
+        assert picked is None or picked.video_id not in flagged
+
+
+def test_seeded_players_play_the_same_videos(capfd):
+    for _ in range(2):
+        player = VideoPlayer(seed=7)
+        for _ in range(5):
+            player.play_random_video()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[:len(lines) // 2] == lines[len(lines) // 2:]
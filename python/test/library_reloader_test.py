@@ -0,0 +1,98 @@
+import os
+
+from src.library_reloader import LibraryReloader
+from src.server import Session
+
+_CATALOG = ("Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+            "Funny Dogs | funny_dogs_video_id | #dog , #animal\n")
+_RELOADED = ("Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+             "Life at Google | life_at_google_video_id | #google\n")
+
+
+def _rewrite(path, text):
+    path.write_text(text)
+    stamp = path.stat().st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_reload_swaps_in_a_new_library(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(_CATALOG)
+    reloader = LibraryReloader(path)
+    first = reloader.library
+    assert not reloader.check()
+
+    _rewrite(path, _RELOADED)
+    assert not reloader.check()
+    assert reloader.check()
+    reloader.wait()
+    assert reloader.library is not first
+    assert reloader.library.get_video("funny_dogs_video_id") is None
+    assert reloader.library.get_video("life_at_google_video_id") is not None
+    # The old library is left untouched for commands still reading it.
+    assert first.get_video("funny_dogs_video_id") is not None
+
+
+def test_failed_reload_keeps_the_library(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(_CATALOG)
+    reloader = LibraryReloader(path)
+    first = reloader.library
+    _rewrite(path, "not a catalog\n")
+    reloader.check()
+    assert reloader.check()
+    reloader.wait()
+    assert reloader.library is first
+    assert reloader.error is not None
+
+
+def test_sessions_keep_state_for_videos_still_present(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(_CATALOG)
+    reloader = LibraryReloader(path)
+    session = Session(reloader.library, reloader=reloader)
+    session.execute("CREATE_PLAYLIST list")
+    session.execute("ADD_TO_PLAYLIST list amazing_cats_video_id")
+    session.execute("ADD_TO_PLAYLIST list funny_dogs_video_id")
+    session.execute("FLAG_VIDEO amazing_cats_video_id boring")
+    session.execute("PLAY funny_dogs_video_id")
+
+    _rewrite(path, _RELOADED)
+    reloader.check()
+    assert reloader.check()
+    reloader.wait()
+    playlist = session.execute("SHOW_PLAYLIST list")
+    assert "amazing_cats_video_id" in playlist
+    assert "FLAGGED (reason: boring)" in playlist
+    assert "funny_dogs_video_id" not in playlist
+    assert "No video is currently playing" in session.execute("SHOW_PLAYING")
+    assert "Life at Google" in session.execute("SHOW_ALL_VIDEOS")
+
+
+def test_reload_waits_for_the_file_to_settle(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(_CATALOG)
+    reloader = LibraryReloader(path)
+    first = reloader.library
+    _rewrite(path, _CATALOG[:20])
+    assert not reloader.check()
+    _rewrite(path, _RELOADED)
+    assert not reloader.check()
+    assert reloader.check()
+    reloader.wait()
+    assert reloader.library is not first
+    assert reloader.library.get_video("life_at_google_video_id") is not None
+
+
+def test_renamed_file_is_loaded_at_the_first_check(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(_CATALOG)
+    reloader = LibraryReloader(path)
+    first = reloader.library
+    replacement = tmp_path / "videos.txt.new"
+    replacement.write_text(_RELOADED)
+    os.replace(replacement, path)
+    assert reloader.check()
+    reloader.wait()
+    assert reloader.library is not first
+    assert reloader.library.get_video("life_at_google_video_id") is not None
@@ -0,0 +1,75 @@
+from src.playlist_store import PlaylistStore
+from src.video_player import VideoPlayer
+
+
+def test_playlists_survive_a_restart(tmp_path, capfd):
+    path = tmp_path / "playlists.log"
+    store = PlaylistStore(path)
+    player = VideoPlayer(playlist_store=store)
+    player.create_playlist("My_List")
+    player.add_to_playlist("my_list", "funny_dogs_video_id")
+    player.add_to_playlist("my_list", "amazing_cats_video_id")
+    player.remove_from_playlist("my_list", "funny_dogs_video_id")
+    player.create_playlist("gone")
+    player.delete_playlist("gone")
+    store.close()
+    capfd.readouterr()
+
+    player = VideoPlayer(playlist_store=PlaylistStore(path))
+    player.show_all_playlists()
+    player.show_playlist("my_list")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4
+    assert "My_List" in lines[1]
+    assert "Amazing Cats (amazing_cats_video_id)" in lines[3]
+
+
+def test_changes_are_committed_in_groups(tmp_path):
+    path = tmp_path / "playlists.log"
+    store = PlaylistStore(path, group_size=3, max_delay=60)
+    store.record("CREATE_PLAYLIST", "a")
+    store.record("ADD_TO_PLAYLIST", "a", "x")
+    assert path.read_text() == ""
+
+    store.record("ADD_TO_PLAYLIST", "a", "y")
+    assert len(path.read_text().splitlines()) == 3
+    store.close()
+
+
+def test_old_changes_are_committed_when_due(tmp_path):
+    path = tmp_path / "playlists.log"
+    store = PlaylistStore(path, max_delay=60)
+    store.record("CREATE_PLAYLIST", "a")
+    store.commit_due()
+    assert path.read_text() == ""
+    store.close()
+
+    store = PlaylistStore(path, max_delay=0)
+    store.record("ADD_TO_PLAYLIST", "a", "x")
+    assert len(path.read_text().splitlines()) == 2
+    store.close()
+
+
+def test_torn_write_is_discarded(tmp_path):
+    path = tmp_path / "playlists.log"
+    path.write_text("CREATE_PLAYLIST a\nADD_TO_PLAYLIST a x\nADD_TO_PLA")
+    store = PlaylistStore(path)
+    store.record("ADD_TO_PLAYLIST", "a", "y")
+    store.close()
+
+    assert list(PlaylistStore(path).playlists()) == [("a", ["x", "y"])]
+
+
+def test_log_is_compacted(tmp_path):
+    path = tmp_path / "playlists.log"
+    store = PlaylistStore(path, group_size=1, compact_ratio=2,
+                          compact_min_records=10)
+    store.record("CREATE_PLAYLIST", "a")
+    for _ in range(5):
+        store.record("ADD_TO_PLAYLIST", "a", "x")
+        store.record("REMOVE_FROM_PLAYLIST", "a", "x")
+    store.close()
+
+    assert len(path.read_text().splitlines()) < 11
+    assert list(PlaylistStore(path).playlists()) == [("a", [])]
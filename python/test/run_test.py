@@ -0,0 +1,33 @@
+import io
+
+from src.playlist_store import PlaylistStore
+from src.run import PROFILE_ENV, run_script
+
+
+def test_run_script_reads_answers_from_the_script():
+    script = io.StringIO("SEARCH_VIDEOS dogs\n1\n\nSHOW_PLAYING\nPLAY\n"
+                         "EXIT\nSTOP\n")
+    output = io.StringIO()
+    run_script(script, output)
+    lines = output.getvalue().splitlines()
+
+    assert len(lines) == 7
+    assert "1) Funny Dogs (funny_dogs_video_id) [#dog #animal]" in lines[1]
+    assert "Playing video: Funny Dogs" in lines[4]
+    assert "Currently playing: Funny Dogs" in lines[5]
+    assert "Please enter PLAY command followed by video_id." in lines[6]
+
+
+def test_run_script_profiles_when_asked(tmp_path, monkeypatch):
+    path = tmp_path / "run.prof"
+    monkeypatch.setenv(PROFILE_ENV, str(path))
+    run_script(io.StringIO("PLAY amazing_cats_video_id\n"), io.StringIO())
+    assert path.exists()
+
+
+def test_run_script_commits_playlist_changes_when_due(tmp_path):
+    path = tmp_path / "playlists.log"
+    store = PlaylistStore(path, max_delay=0)
+    run_script(io.StringIO("CREATE_PLAYLIST a\n"), io.StringIO(), store)
+    assert path.read_text() == "CREATE_PLAYLIST a\n"
+    store.close()
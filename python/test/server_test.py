@@ -0,0 +1,118 @@
+import asyncio
+
+from src.server import PROMPT, Session, start_server
+from src.video_library import VideoLibrary
+
+
+async def _command(reader, writer, line):
+    writer.write(f"{line}\n".encode())
+    await writer.drain()
+    return (await reader.readuntil(PROMPT.encode())).decode()
+
+
+async def _two_sessions():
+    server = await start_server(port=0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        first = await asyncio.open_connection("127.0.0.1", port)
+        second = await asyncio.open_connection("127.0.0.1", port)
+        for reader, _ in (first, second):
+            await reader.readuntil(PROMPT.encode())
+
+        played = await _command(*first, "PLAY amazing_cats_video_id")
+        first_playing = await _command(*first, "SHOW_PLAYING")
+        second_playing = await _command(*second, "SHOW_PLAYING")
+
+        for _, writer in (first, second):
+            writer.close()
+        return played, first_playing, second_playing
+
+
+def test_sessions_have_independent_state():
+    played, first_playing, second_playing = asyncio.run(_two_sessions())
+
+    assert "Playing video: Amazing Cats" in played
+    assert "Currently playing: Amazing Cats" in first_playing
+    assert "No video is currently playing" in second_playing
+
+
+def test_sessions_see_applied_deltas(tmp_path):
+    library = VideoLibrary()
+    session = Session(library)
+    session.execute("CREATE_PLAYLIST list")
+    session.execute("ADD_TO_PLAYLIST list amazing_cats_video_id")
+    session.execute("ADD_TO_PLAYLIST list funny_dogs_video_id")
+    delta = tmp_path / "delta.txt"
+    delta.write_text("Cats Again | amazing_cats_video_id | #cat\n"
+                     " | funny_dogs_video_id | \n")
+    library.apply_delta(delta)
+    playlist = session.execute("SHOW_PLAYLIST list")
+    assert "Cats Again (amazing_cats_video_id) [#cat]" in playlist
+    assert "funny_dogs_video_id" not in playlist
+
+
+def test_apply_delta_command(tmp_path):
+    (tmp_path / "delta.txt").write_text(" | funny_dogs_video_id | \n")
+    library = VideoLibrary()
+    session = Session(library, delta_dir=tmp_path)
+    other = Session(library)
+    other.execute("PLAY funny_dogs_video_id")
+    assert "Applied delta delta.txt: 0 videos added or replaced, 1 removed" \
+           in session.execute("APPLY_DELTA ../delta.txt")
+    assert "Cannot apply delta" in session.execute("APPLY_DELTA missing.txt")
+    assert "No video is currently playing" in other.execute("SHOW_PLAYING")
+    assert "Please enter a valid command" in other.execute("APPLY_DELTA x")
+
+
+async def _bad_input():
+    server = await start_server(port=0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readuntil(PROMPT.encode())
+        writer.write(b"PLAY \xff\xfe\n")
+        invalid = (await reader.readuntil(PROMPT.encode())).decode()
+        writer.write(b"SEARCH_VIDEOS " + b"x" * (1 << 17)
+                     + b" PLAY amazing_cats_video_id\n")
+        await writer.drain()
+        too_long = (await reader.readuntil(PROMPT.encode())).decode()
+        played = await _command(reader, writer, "PLAY funny_dogs_video_id")
+        writer.close()
+        return invalid, too_long, played
+
+
+def test_bad_input_keeps_the_session_open():
+    invalid, too_long, played = asyncio.run(_bad_input())
+
+    assert "Cannot run command: Line is not valid UTF-8" in invalid
+    assert "Cannot run command: Line is too long" in too_long
+    assert "Amazing Cats" not in played
+    assert "Playing video: Funny Dogs" in played
+
+
+def test_unexpected_errors_are_reported():
+    session = Session(VideoLibrary())
+
+    def broken():
+        raise RuntimeError("boom")
+
+    session._parser.register("BROKEN", broken)
+    assert "Cannot run command: RuntimeError: boom" in \
+           session.execute("BROKEN")
+    assert "5 videos in the library" in session.execute("NUMBER_OF_VIDEOS")
+
+
+async def _start_and_close(library):
+    server = await start_server(library, port=0)
+    server.close()
+    await server.wait_closed()
+
+
+def test_indexes_are_built_at_startup(monkeypatch):
+    library = VideoLibrary(lazy=True)
+    built = []
+    build_indexes = library.build_indexes
+    monkeypatch.setattr(library, "build_indexes",
+                        lambda: built.append(build_indexes()))
+    asyncio.run(_start_and_close(library))
+    assert built
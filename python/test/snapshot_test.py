@@ -0,0 +1,64 @@
+import pytest
+
+from src.playlist_store import PlaylistStore
+from src.snapshot import load_snapshot, save_snapshot
+from src.video_player import VideoPlayer
+
+
+def test_snapshot_restores_playback_and_playlists(tmp_path, capfd):
+    path = tmp_path / "player.snapshot"
+    player = VideoPlayer()
+    player.create_playlist("My_List")
+    player.add_to_playlist("my_list", "funny_dogs_video_id")
+    player.play_video("life_at_google_video_id")
+    player.play_video("amazing_cats_video_id")
+    player.pause_video()
+    player.flag_video("nothing_video_id", "boring")
+    save_snapshot(player, path)
+    capfd.readouterr()
+
+    restored = VideoPlayer()
+    load_snapshot(restored, path)
+    restored.show_playing()
+    restored.show_all_playlists()
+    restored.show_playlist("my_list")
+    restored.play_video("nothing_video_id")
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 6
+    assert "Currently playing: Amazing Cats (amazing_cats_video_id) " \
+           "[#cat #animal] - PAUSED" in lines[0]
+    assert "My_List" in lines[2]
+    assert "Funny Dogs (funny_dogs_video_id)" in lines[4]
+    assert "Cannot play video: Video is currently flagged " \
+           "(reason: boring)" in lines[5]
+    assert restored.get_state() == player.get_state()
+
+
+def test_load_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_snapshot"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        load_snapshot(VideoPlayer(), path)
+
+
+def test_playlist_store_wins_over_snapshot(tmp_path, capfd):
+    path = tmp_path / "player.snapshot"
+    player = VideoPlayer()
+    player.create_playlist("from_snapshot")
+    player.play_video("funny_dogs_video_id")
+    save_snapshot(player, path)
+
+    store = PlaylistStore(tmp_path / "playlists.log")
+    restored = VideoPlayer(playlist_store=store)
+    restored.create_playlist("from_store")
+    load_snapshot(restored, path)
+    capfd.readouterr()
+    restored.show_all_playlists()
+    restored.show_playing()
+    store.close()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[1:] == ["\tfrom_store",
+                         "Currently playing: Funny Dogs (funny_dogs_video_id) "
+                         "[#dog #animal]"]
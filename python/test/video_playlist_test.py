@@ -0,0 +1,21 @@
+from src.video import Video
+from src.video_playlist import Playlist
+
+
+def test_playlist_keeps_insertion_order_and_display_name():
+    playlist = Playlist("My_LIST")
+    first = Video("First", "first_id", [])
+    second = Video("Second", "second_id", [])
+
+    assert playlist.add(second)
+    assert playlist.add(first)
+    assert not playlist.add(second)
+    assert playlist.name == "My_LIST"
+    assert playlist.key == "my_list"
+    assert "first_id" in playlist
+    assert [video.video_id for video in playlist] == ["second_id", "first_id"]
+    assert playlist.videos(1, 5) == [first]
+
+    assert playlist.remove("second_id")
+    assert not playlist.remove("second_id")
+    assert len(playlist) == 1
@@ -0,0 +1,47 @@
+from src.video import Video
+from src.video_table import VideoTable
+
+
+def test_rows_are_found_by_id():
+    table = VideoTable()
+    cats = table.append("Amazing Cats", "amazing_cats_video_id",
+                        ["#cat", "#animal"])
+    dogs = table.append("Funny Dogs", "funny_dogs_video_id", [])
+
+    assert len(table) == 2
+    assert table.find("amazing_cats_video_id") == cats
+    assert table.find("funny_dogs_video_id") == dogs
+    assert table.find("missing_video_id") is None
+    assert table.title(cats) == "Amazing Cats"
+    assert table.tags(cats) == ("#cat", "#animal")
+    assert table.tags(dogs) == ()
+    assert list(table) == ["amazing_cats_video_id", "funny_dogs_video_id"]
+
+
+def test_removed_rows_stay_readable():
+    table = VideoTable()
+    row = table.append("Amazing Cats", "amazing_cats_video_id", ["#cat"])
+    video = Video.view(table, row)
+    assert table.remove("amazing_cats_video_id") == row
+    assert table.remove("amazing_cats_video_id") is None
+
+    assert "amazing_cats_video_id" not in table
+    assert list(table.rows()) == []
+    assert video.title == "Amazing Cats"
+    new_row = table.append("Cats Again", "amazing_cats_video_id", [])
+    assert new_row != row
+    assert table.find("amazing_cats_video_id") == new_row
+
+
+def test_many_rows_and_tags():
+    table = VideoTable()
+    for number in range(70000):
+        table.append(f"Video {number}", f"id_{number}", [f"#{number}"])
+    for number in range(0, 70000, 2):
+        table.remove(f"id_{number}")
+
+    assert len(table) == 35000
+    assert table.find("id_2") is None
+    row = table.find("id_69999")
+    assert table.title(row) == "Video 69999"
+    assert table.tags(row) == ("#69999",)
@@ -1,3 +1,10 @@
+from pathlib import Path
+
+import pytest
+
+import src
+from src.catalog import compile_videos_file, write_catalog
+from src.tag_index import TagIndex
 from src.video_library import VideoLibrary
 
 
@@ -24,3 +31,196 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_search_videos_matches_substrings_case_insensitively():
+    library = VideoLibrary()
+    titles = [video.title for video in library.search_videos("CAT")]
+
+    assert titles == ["Amazing Cats", "Another Cat Video"]
+
+
+def test_search_videos_with_long_term():
+    library = VideoLibrary()
+
+    assert [video.video_id for video in library.search_videos("at goog")] == [
+        "life_at_google_video_id"]
+    assert library.search_videos("cats video") == []
+
+
+def test_search_videos_with_tag_is_case_insensitive():
+    library = VideoLibrary()
+    ids = [video.video_id for video in library.search_videos_with_tag("#CAT")]
+
+    assert ids == ["amazing_cats_video_id", "another_cat_video_id"]
+    assert library.search_videos_with_tag("cat") == []
+
+
+def test_search_videos_with_tags_all_and_any():
+    library = VideoLibrary()
+    both = library.search_videos_with_tags(["#animal", "#dog"])
+    either = library.search_videos_with_tags(["#dog", "#google"],
+                                             match_all=False)
+
+    assert [video.video_id for video in both] == ["funny_dogs_video_id"]
+    assert [video.title for video in either] == ["Funny Dogs",
+                                                 "Life at Google"]
+
+
+def test_lazy_library_parses_videos_on_demand():
+    library = VideoLibrary(lazy=True)
+
+    assert len(library.get_all_videos()) == 5
+    assert library.get_video("does_not_exist") is None
+    video = library.get_video("amazing_cats_video_id")
+    assert video.title == "Amazing Cats"
+    assert set(video.tags) == {"#cat", "#animal"}
+    assert library.get_video("amazing_cats_video_id") == video
+    assert library.get_video("nothing_video_id").tags == ()
+    assert [v.title for v in library.search_videos_with_tag("#dog")] == [
+        "Funny Dogs"]
+
+
+def test_compiled_catalog_loads_same_videos(tmp_path):
+    text_library = VideoLibrary()
+    catalog = tmp_path / "videos.bin"
+    write_catalog(((video.title, video.video_id, video.tags)
+                   for video in text_library.get_all_videos()), catalog)
+    library = VideoLibrary(videos_file=catalog)
+    streamed = tmp_path / "streamed.bin"
+    compile_videos_file(Path(src.__file__).parent / "videos.txt", streamed)
+    assert streamed.read_bytes() == catalog.read_bytes()
+
+    assert len(library.get_all_videos()) == 5
+    assert library.get_video("does_not_exist") is None
+    for expected in text_library.get_all_videos():
+        video = library.get_video(expected.video_id)
+        assert video.title == expected.title
+        assert video.tags == expected.tags
+    assert [v.title for v in library.search_videos("cat")] == [
+        "Amazing Cats", "Another Cat Video"]
+
+
+def test_tags_are_interned_across_videos():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    dogs = library.get_video("funny_dogs_video_id")
+
+    assert cats.tags[1] == dogs.tags[1] == "#animal"
+    assert cats.tags[1] is dogs.tags[1]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_add_and_remove_videos_update_title_order(lazy):
+    library = VideoLibrary(lazy=lazy)
+    library.add_video("Cats at Google", "google_cats_video_id", ["#cat"])
+    library.remove_video("funny_dogs_video_id")
+    library.add_video("Zebras", "amazing_cats_video_id", [])
+
+    titles = [video.title for video in library.get_videos_by_title()]
+    assert titles == ["Another Cat Video", "Cats at Google", "Life at Google",
+                      "Video about nothing", "Zebras"]
+    assert len(library.get_all_videos()) == 5
+    assert library.get_video("funny_dogs_video_id") is None
+    assert [v.title for v in library.get_videos_by_title(1, 2)] == [
+        "Cats at Google", "Life at Google"]
+    assert [v.title for v in library.search_videos("cat")] == [
+        "Another Cat Video", "Cats at Google"]
+    assert [v.video_id for v in library.search_videos_with_tag("#cat")] == [
+        "another_cat_video_id", "google_cats_video_id"]
+
+
+def test_apply_delta(tmp_path):
+    delta = tmp_path / "delta.txt"
+    delta.write_text("Amazing Cats Returns | amazing_cats_video_id | #cat\n"
+                     "New Video | new_video_id | #new , #animal\n"
+                     " | funny_dogs_video_id | \n"
+                     " | missing_video_id | \n"
+                     "\n")
+    library = VideoLibrary()
+    assert library.apply_delta(delta) == (2, 1)
+    assert len(library.get_all_videos()) == 5
+    assert library.get_video("funny_dogs_video_id") is None
+    assert library.get_video("amazing_cats_video_id").title == \
+           "Amazing Cats Returns"
+    assert [video.video_id for video in library.search_videos("returns")] == \
+           ["amazing_cats_video_id"]
+    assert [video.video_id
+            for video in library.search_videos_with_tag("#animal")] == \
+           ["another_cat_video_id", "new_video_id"]
+    assert [video.title for video in library.get_videos_by_title(0, 2)] == \
+           ["Amazing Cats Returns", "Another Cat Video"]
+
+
+def test_apply_malformed_delta_changes_nothing(tmp_path):
+    delta = tmp_path / "delta.txt"
+    delta.write_text(" | funny_dogs_video_id | \nno separators\n")
+    library = VideoLibrary()
+    with pytest.raises(ValueError, match="delta.txt:2"):
+        library.apply_delta(delta)
+    assert library.get_video("funny_dogs_video_id") is not None
+
+
+def test_tag_index_extend_matches_add():
+    videos = [("c", ["#a", "#B"]), ("a", ["#b"]), ("b", ["#a", "#a"])]
+    added, extended = TagIndex(), TagIndex()
+    for video_id, tags in videos:
+        added.add(video_id, tags)
+    extended.extend(videos)
+    for tag in ("#a", "#b"):
+        assert extended.search(tag) == added.search(tag)
+    assert extended.search("#a") == ["b", "c"]
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_more_than_65536_distinct_tags(tmp_path, compiled):
+    path = tmp_path / "videos.txt"
+    path.write_text("".join(f"Video {number} | video_{number} | #t{number}\n"
+                            for number in range(70000)))
+    if compiled:
+        compile_videos_file(path, tmp_path / "videos.bin")
+        path = tmp_path / "videos.bin"
+    library = VideoLibrary(videos_file=path)
+    assert library.get_video("video_69999").tags == ("#t69999",)
+    assert [video.video_id
+            for video in library.search_videos_with_tag("#t65540")] == \
+           ["video_65540"]
+
+
+def test_search_short_terms():
+    library = VideoLibrary()
+    assert [video.title for video in library.search_videos("Og")] == [
+        "Funny Dogs", "Life at Google"]
+    assert len(library.search_videos("a")) == 4
+    assert len(library.search_videos("")) == 5
+
+
+def test_equal_titles_are_ordered_by_id(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Same | c_id | #same\nSame | a_id | #same\n"
+                    "Same | b_id | #same\n")
+    library = VideoLibrary(videos_file=path)
+    expected = ["a_id", "b_id", "c_id"]
+    assert [video.video_id for video in library.search_videos("same")] == \
+           expected
+    assert [video.video_id for video in library.search_videos("s")] == \
+           expected
+    assert [video.video_id
+            for video in library.search_videos_with_tag("#same")] == expected
+    assert [video.video_id for video in library.get_videos_by_title()] == \
+           expected
+
+
+def test_later_row_replaces_earlier_with_same_id(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Old Title | same_id | #old\n"
+                    "Other | other_id | \n"
+                    "New Title | same_id | #new\n")
+    library = VideoLibrary(videos_file=path)
+
+    assert len(library.get_all_videos()) == 2
+    assert library.get_video("same_id").title == "New Title"
+    assert library.search_videos("old") == []
+    assert library.search_videos_with_tag("#old") == []
+    assert [video.video_id for video in library.get_videos_by_title()] == [
+        "same_id", "other_id"]